@@ -0,0 +1,234 @@
+"""Бенчмарк page_loader.download() на локальном HTTP-сервере.
+
+Сервер отдаёт синтетические страницы: с множеством ресурсов, с большими
+ресурсами, с глубоким DOM и с задержкой ответа. Для каждого сценария
+считаются страницы/сек, ресурсы/сек, p50/p99 времени страницы и пиковый
+RSS процесса; результат пишется в JSON для сравнения между версиями.
+
+    python -m benchmarks.bench_download -o bench.json
+    python -m benchmarks.bench_download --compare bench.json
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SCENARIOS = {
+    # имя: (число ресурсов, размер ресурса, глубина DOM, задержка, сек)
+    "many_assets": (200, 2 * 1024, 10, 0),
+    "large_assets": (4, 8 * 1024 * 1024, 10, 0),
+    "deep_dom": (5, 1024, 400, 0),
+    "slow_responses": (30, 1024, 10, 0.02),
+}
+
+
+def build_page(scenario, assets, depth):
+    """Синтетическая страница с assets ресурсами и вложенностью depth"""
+    tags = []
+    for i in range(assets):
+        kind = i % 3
+        if kind == 0:
+            tags.append(f'<img src="/{scenario}/asset/{i}.png">')
+        elif kind == 1:
+            tags.append(f'<script src="/{scenario}/asset/{i}.js"></script>')
+        else:
+            tags.append(
+                f'<link rel="stylesheet" href="/{scenario}/asset/{i}.css">')
+    body = "".join(tags)
+    nested = "<div>" * depth + "<p>текст</p>" + "</div>" * depth
+    return f"<html><head></head><body>{body}{nested}</body></html>"
+
+
+class BenchHandler(BaseHTTPRequestHandler):
+    """Отдаёт /<сценарий>/page<номер> и /<сценарий>/asset/<файл>"""
+
+    def do_GET(self):
+        parts = self.path.split("/")
+        scenario = parts[1] if len(parts) > 2 else ""
+        if scenario not in SCENARIOS:
+            self.send_error(404)
+            return
+        assets, size, depth, delay = SCENARIOS[scenario]
+        if delay:
+            time.sleep(delay)
+
+        if parts[2].startswith("page"):
+            body = build_page(scenario, assets, depth).encode("utf-8")
+            content_type = "text/html; charset=utf-8"
+        else:
+            body = b"x" * size
+            content_type = "application/octet-stream"
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server():
+    """Запускает сервер в фоновом потоке на свободном порту"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), BenchHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def percentile(values, fraction):
+    """Перцентиль по ближайшему рангу"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1,
+                       math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def peak_rss_bytes():
+    """Пиковый RSS текущего процесса в байтах"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux отдаёт килобайты, macOS - байты
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_scenario(base_url, scenario, iterations, options):
+    """Скачивает страницу сценария iterations раз и собирает метрики.
+
+    Запускается в отдельном процессе, чтобы пиковый RSS относился только
+    к этому сценарию. options["storage"] == "memory" сохраняет страницы
+    в MemoryStorage, исключая из замера запись на диск.
+    """
+    logging.disable(logging.CRITICAL)
+    from page_loader import download
+    from page_loader.storage import MemoryStorage
+
+    options = dict(options)
+    storage = None
+    if options.pop("storage", "files") == "memory":
+        storage = options["storage"] = MemoryStorage()
+    assets = SCENARIOS[scenario][0]
+    durations = []
+    saved = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        for n in range(iterations):
+            output_dir = os.path.join(tmp, str(n))
+            url = f"{base_url}/{scenario}/page{n}"
+            if storage is None:
+                os.mkdir(output_dir)
+            page_started = time.perf_counter()
+            download(url, output_dir, **options)
+            durations.append(time.perf_counter() - page_started)
+            if storage is None:
+                saved += sum(len(files)
+                             for _, _, files in os.walk(output_dir))
+            else:
+                saved += len(storage.files)
+                storage.files.clear()
+            saved -= 1
+        total = time.perf_counter() - started
+
+    return {
+        "iterations": iterations,
+        "assets_per_page": assets,
+        # Меньше iterations * assets_per_page значит, что часть ресурсов
+        # не скачалась и цифры скорости недостоверны
+        "assets_saved": saved,
+        "total_seconds": round(total, 6),
+        "pages_per_sec": round(iterations / total, 3),
+        "assets_per_sec": round(iterations * assets / total, 3),
+        "p50_seconds": round(statistics.median(durations), 6),
+        "p99_seconds": round(percentile(durations, 0.99), 6),
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+
+
+def run_suite(scenarios, iterations, options):
+    """Прогоняет сценарии на локальном сервере и возвращает отчёт"""
+    server = start_server()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    results = {}
+    try:
+        for scenario in scenarios:
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                results[scenario] = executor.submit(
+                    run_scenario, base_url, scenario, iterations,
+                    options).result()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    return {
+        "benchmark": "page_loader.download",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": options,
+        "scenarios": results,
+    }
+
+
+def compare(report, baseline):
+    """Печатает изменение метрик относительно прошлого отчёта"""
+    lines = []
+    for scenario, metrics in report["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(scenario)
+        if not old:
+            continue
+        for key in ("pages_per_sec", "p50_seconds", "p99_seconds",
+                    "peak_rss_bytes"):
+            if old.get(key):
+                change = (metrics[key] - old[key]) / old[key] * 100
+                lines.append(f"{scenario:16} {key:16} {old[key]:>14} -> "
+                             f"{metrics[key]:>14} ({change:+.1f}%)")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Бенчмарк page_loader.download()")
+    parser.add_argument("-s", "--scenario", action="append",
+                        choices=sorted(SCENARIOS),
+                        help="Сценарий (можно несколько); по умолчанию все")
+    parser.add_argument("-n", "--iterations", type=int, default=5,
+                        help="Сколько раз скачивать страницу сценария")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="max_workers для download()")
+    parser.add_argument("-o", "--output",
+                        help="Файл для JSON-отчёта; по умолчанию stdout")
+    parser.add_argument("--memory", action="store_true",
+                        help="Сохранять страницы в памяти, без диска")
+    parser.add_argument("--compare",
+                        help="JSON-отчёт прошлой версии для сравнения")
+    args = parser.parse_args(argv)
+
+    options = {"max_workers": args.workers}
+    if args.memory:
+        options["storage"] = "memory"
+    report = run_suite(args.scenario or list(SCENARIOS), args.iterations,
+                       options)
+    data = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(data + "\n")
+    else:
+        print(data)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print(compare(report, json.load(f)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Бенчмарк времени запуска CLI page-loader.
+
+Каждая команда запускается в отдельном процессе интерпретатора: --help,
+ошибка в аргументах и голый импорт пакета. Для каждой считаются
+min/p50/p90 времени и разница с пустым запуском python; отдельно
+проверяется, какие тяжёлые модули (requests, bs4...) успели загрузиться.
+Результат пишется в JSON для сравнения между версиями.
+
+    python -m benchmarks.bench_startup -o startup.json
+    python -m benchmarks.bench_startup --compare startup.json
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.bench_download import percentile
+
+COMMANDS = {
+    "python": ["-c", "pass"],
+    "import": ["-c", "import page_loader"],
+    "help": ["-m", "page_loader.cli", "--help"],
+    "invalid_args": ["-m", "page_loader.cli", "--workers", "0",
+                     "https://example.com"],
+}
+# Модули, которые не нужны для справки и проверки аргументов
+HEAVY_MODULES = ("requests", "urllib3", "bs4", "lxml", "httpx", "asyncio",
+                 "multiprocessing")
+
+
+def run_command(args):
+    """Запускает python с аргументами и возвращает время, сек"""
+    started = time.perf_counter()
+    subprocess.run([sys.executable, *args], stdout=subprocess.DEVNULL,
+                   stderr=subprocess.DEVNULL, check=False)
+    return time.perf_counter() - started
+
+
+def heavy_imports(args):
+    """Тяжёлые модули, загруженные командой, по выводу -X importtime"""
+    result = subprocess.run([sys.executable, "-X", "importtime", *args],
+                            stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, text=True, check=False)
+    loaded = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        name = line.rsplit("|", 1)[-1].strip()
+        if name in HEAVY_MODULES:
+            loaded.add(name)
+    return sorted(loaded)
+
+
+def run_suite(commands, iterations):
+    """Замеряет команды и собирает отчёт"""
+    results = {}
+    for name in commands:
+        # Первый запуск прогревает кеш байткода и файловой системы
+        run_command(COMMANDS[name])
+        times = sorted(run_command(COMMANDS[name])
+                       for _ in range(iterations))
+        results[name] = {
+            "min_seconds": round(times[0], 4),
+            "p50_seconds": round(statistics.median(times), 4),
+            "p90_seconds": round(percentile(times, 0.9), 4),
+            "heavy_modules": heavy_imports(COMMANDS[name]),
+        }
+    base = results.get("python")
+    if base:
+        for metrics in results.values():
+            metrics["overhead_seconds"] = round(
+                metrics["p50_seconds"] - base["p50_seconds"], 4)
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "iterations": iterations,
+        "commands": results,
+    }
+
+
+def compare(report, baseline):
+    """Печатает изменение времени запуска относительно прошлого отчёта"""
+    lines = []
+    for name, metrics in report["commands"].items():
+        old = baseline.get("commands", {}).get(name)
+        if not old or not old.get("p50_seconds"):
+            continue
+        change = (metrics["p50_seconds"] - old["p50_seconds"]) \
+            / old["p50_seconds"] * 100
+        lines.append(f"{name:14} p50_seconds {old['p50_seconds']:>8} -> "
+                     f"{metrics['p50_seconds']:>8} ({change:+.1f}%)")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Бенчмарк времени запуска page-loader")
+    parser.add_argument("-c", "--command", action="append",
+                        choices=sorted(COMMANDS),
+                        help="Команда (можно несколько); по умолчанию все")
+    parser.add_argument("-n", "--iterations", type=int, default=20,
+                        help="Сколько раз запускать каждую команду")
+    parser.add_argument("-o", "--output",
+                        help="Файл для JSON-отчёта; по умолчанию stdout")
+    parser.add_argument("--compare",
+                        help="JSON-отчёт прошлой версии для сравнения")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.command or list(COMMANDS), args.iterations)
+    data = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(data + "\n")
+    else:
+        print(data)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print(compare(report, json.load(f)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,37 @@
-from .page_loader import download
+import importlib
+import logging
 
-__all__ = ["download"]
+# Библиотека не настраивает логирование сама: без настройки приложением
+# сообщения page_loader не выводятся
+logging.getLogger(__name__).addHandler(logging.NullHandler())
+
+__all__ = ["async_download", "download", "make_session"]
+
+# Модули с requests, bs4 и asyncio загружаются при первом обращении к
+# функции, а не при импорте пакета: так page_loader.cli запускается
+# быстрее
+_LAZY = {
+    "async_download": ".async_loader",
+    "download": ".page_loader",
+    "make_session": ".session",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+    else:
+        # page_loader.<модуль> доступен и без явного импорта модуля
+        try:
+            value = importlib.import_module(f".{name}", __name__)
+        except ModuleNotFoundError as e:
+            if e.name != f"{__name__}.{name}":
+                raise
+            raise AttributeError(
+                f"module {__name__!r} has no attribute {name!r}") from None
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
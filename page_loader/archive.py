@@ -0,0 +1,77 @@
+import json
+import os
+import threading
+import zipfile
+
+INDEX_NAME = "index.json"
+# Текстовые форматы сжимаем, остальные (картинки, шрифты) обычно уже
+# сжаты и хранятся как есть
+TEXT_EXTENSIONS = ('.html', '.htm', '.css', '.js', '.json', '.svg', '.txt',
+                   '.xml')
+
+
+def _compression(name):
+    if name.lower().endswith(TEXT_EXTENSIONS):
+        return zipfile.ZIP_DEFLATED
+    return zipfile.ZIP_STORED
+
+
+class PageArchive:
+    """Zip-архив со страницей и её ресурсами вместо множества файлов.
+
+    Внутри архива та же структура, что и на диске: <имя>.html и
+    <имя>_files/, поэтому распакованная страница открывается как обычно.
+    Ресурсы добавляются по мере загрузки, а index.json связывает URL
+    ресурсов с именами в архиве для чтения без распаковки.
+    Архив пишется во временный файл и появляется только после close().
+    """
+
+    def __init__(self, path, prefix):
+        self.path = str(path)
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._index = {}
+        self._zip = zipfile.ZipFile(f"{self.path}.part", 'w')
+
+    def add_resource(self, url, path):
+        """Переносит скачанный файл ресурса в архив и удаляет его"""
+        name = f"{self.prefix}/{os.path.basename(path)}"
+        with self._lock:
+            self._zip.write(path, name, compress_type=_compression(name))
+            self._index[url] = {'name': name,
+                                'size': os.path.getsize(path)}
+        os.remove(path)
+
+    def write_page(self, name, html):
+        """Записывает HTML страницы в архив"""
+        with self._lock:
+            self._zip.writestr(name, html, compress_type=zipfile.ZIP_DEFLATED)
+
+    def close(self):
+        """Дописывает индекс и атомарно сохраняет архив"""
+        with self._lock:
+            self._zip.writestr(INDEX_NAME, json.dumps(
+                self._index, ensure_ascii=False, indent=2, sort_keys=True))
+            self._zip.close()
+        os.replace(f"{self.path}.part", self.path)
+
+    def abort(self):
+        """Закрывает архив без сохранения"""
+        with self._lock:
+            self._zip.close()
+        try:
+            os.remove(f"{self.path}.part")
+        except FileNotFoundError:
+            pass
+
+
+def read_resource(archive_path, url):
+    """Читает из архива страницы ресурс по URL без распаковки"""
+    with zipfile.ZipFile(archive_path) as archive:
+        index = json.loads(archive.read(INDEX_NAME))
+        try:
+            name = index[url]['name']
+        except KeyError:
+            raise KeyError(
+                f"Ресурса {url} нет в архиве {archive_path}") from None
+        return archive.read(name)
@@ -0,0 +1,199 @@
+import asyncio
+import contextlib
+import os
+from urllib.parse import urlparse
+
+import requests.compat
+import requests.utils
+
+from page_loader.page_loader import (CHUNK_SIZE, OVERSIZE_POLICIES,
+                                     FileNamer, ResourceTooLargeError,
+                                     check_declared_size, clip_chunk,
+                                     finish_page, logger, prepare_page,
+                                     rewrite_stylesheets, scan_stylesheets,
+                                     stylesheet_urls)
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - зависит от окружения
+    httpx = None
+
+DEFAULT_MAX_CONCURRENCY = 10
+DEFAULT_PER_HOST = 6
+
+
+class HostLimiter:
+    """Ограничивает число одновременных запросов глобально и на хост"""
+
+    def __init__(self, max_concurrency, per_host):
+        self._global = asyncio.Semaphore(max_concurrency)
+        self._per_host = per_host
+        self._hosts = {}
+
+    def _host_semaphore(self, url):
+        host = urlparse(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self._per_host)
+        return self._hosts[host]
+
+    @contextlib.asynccontextmanager
+    async def slot(self, url):
+        """Занимает общий слот и слот хоста на время запроса"""
+        async with self._global:
+            async with self._host_semaphore(url):
+                yield
+
+
+def decode_page(content, headers):
+    """Декодирует тело страницы так же, как requests.Response.text"""
+    encoding = requests.utils.get_encoding_from_headers(headers)
+    if encoding is None:
+        encoding = requests.compat.chardet.detect(content)['encoding']
+    try:
+        return str(content, encoding, errors='replace')
+    except (LookupError, TypeError):
+        return str(content, errors='replace')
+
+
+async def async_download_resource(client, resource_url, save_path,
+                                  max_size=None, on_oversize='skip'):
+    """Асинхронно скачивает ресурс потоково, как download_resource().
+
+    Запись на диск выполняется в потоках asyncio.to_thread(), чтобы не
+    останавливать цикл событий.
+    """
+    logger.debug("Попытка загрузить ресурс: %s", resource_url)
+    async with client.stream('GET', resource_url) as response:
+        try:
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.error("Ошибка сети при загрузке ресурса %s: %s",
+                         resource_url, e)
+            raise
+        check_declared_size(response.headers, max_size, on_oversize,
+                            resource_url)
+
+        tmp_path = f"{save_path}.part"
+        written = 0
+        try:
+            await asyncio.to_thread(os.makedirs, os.path.dirname(save_path),
+                                    exist_ok=True)
+            f = await asyncio.to_thread(open, tmp_path, 'wb')
+            try:
+                async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                    chunk, truncated = clip_chunk(chunk, written, max_size,
+                                                  on_oversize, resource_url)
+                    await asyncio.to_thread(f.write, chunk)
+                    written += len(chunk)
+                    if truncated:
+                        break
+            except BaseException:
+                f.close()
+                raise
+            await asyncio.to_thread(f.close)
+            await asyncio.to_thread(os.replace, tmp_path, save_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    logger.info("Ресурс успешно сохранён: %s", save_path)
+    return written
+
+
+async def _fetch_resource(client, limiter, full_url, resource_path, options):
+    """Скачивает один ресурс, возвращает True при успехе"""
+    async with limiter.slot(full_url):
+        try:
+            logger.info("Загрузка ресурса: %s", full_url)
+            await async_download_resource(client, full_url, resource_path,
+                                          **options)
+            return True
+        except (httpx.HTTPError, ResourceTooLargeError) as e:
+            logger.warning("Не удалось скачать ресурс %s: %s", full_url, e)
+            return False
+
+
+async def async_download(url, output_dir=None, client=None,
+                         max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                         per_host=DEFAULT_PER_HOST, max_size=None,
+                         on_oversize='skip', parser='html.parser',
+                         rewrite='prettify'):
+    """Асинхронный аналог download() на httpx.
+
+    Ресурсы скачиваются конкурентно, не больше max_concurrency запросов
+    всего и per_host запросов к одному хосту; ресурсы из скачанных
+    CSS-файлов забираются следующими волнами, как в download().
+    Сохранённые файлы совпадают с результатом download() байт в байт.
+    client - httpx.AsyncClient; если не передан, создаётся на время вызова.
+    parser и rewrite имеют тот же смысл, что и в download().
+    Разбор HTML и CSS и запись файлов идут в потоках asyncio.to_thread().
+    """
+    if httpx is None:
+        raise ImportError("Для async_download нужен httpx: "
+                          "pip install hexlet-code[async]")
+    if max_concurrency < 1 or per_host < 1:
+        raise ValueError("max_concurrency и per_host должны быть не меньше 1")
+    if on_oversize not in OVERSIZE_POLICIES:
+        raise ValueError(f"Неизвестная политика on_oversize: {on_oversize}")
+    output_dir = os.getcwd() if output_dir is None else output_dir
+
+    if client is None:
+        limits = httpx.Limits(max_connections=max_concurrency,
+                              max_keepalive_connections=max_concurrency)
+        async with httpx.AsyncClient(limits=limits,
+                                     follow_redirects=True) as own_client:
+            return await async_download(url, output_dir, own_client,
+                                        max_concurrency, per_host,
+                                        max_size, on_oversize, parser,
+                                        rewrite)
+
+    limiter = HostLimiter(max_concurrency, per_host)
+    logger.info("Начало загрузки страницы: %s", url)
+    try:
+        async with limiter.slot(url):
+            response = await client.get(url)
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        logger.error("Ошибка при запросе страницы %s: %s", url, e)
+        raise
+
+    html = await asyncio.to_thread(decode_page, response.content,
+                                   response.headers)
+    namer = FileNamer()
+    document, base_name, resource_dir, resources = await asyncio.to_thread(
+        prepare_page, html, url, output_dir, parser=parser, rewrite=rewrite,
+        namer=namer)
+
+    options = {'max_size': max_size, 'on_oversize': on_oversize}
+
+    async def fetch_all(batch):
+        urls = list(batch)
+        results = await asyncio.gather(*(
+            _fetch_resource(client, limiter, full_url,
+                            os.path.join(resource_dir, batch[full_url][0]),
+                            options)
+            for full_url in urls))
+        return {full_url for full_url, ok in zip(urls, results) if ok}
+
+    downloaded = await fetch_all(resources)
+    # Ресурсы из CSS - те же волны, что в fetch_stylesheets()
+    sheets = []
+    pending = stylesheet_urls(resources, downloaded)
+    while pending:
+        found = await asyncio.to_thread(scan_stylesheets, pending,
+                                        resources, resource_dir, url, sheets,
+                                        namer)
+        if not found:
+            break
+        resources.update(found)
+        fetched = await fetch_all(found)
+        downloaded |= fetched
+        pending = stylesheet_urls(found, fetched)
+    await asyncio.to_thread(rewrite_stylesheets, sheets, resources,
+                            downloaded)
+
+    html_path = await asyncio.to_thread(finish_page, document, resources,
+                                        downloaded, base_name, output_dir,
+                                        resource_dir)
+    logger.info("Загрузка страницы завершена: %s", url)
+    return html_path
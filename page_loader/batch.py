@@ -0,0 +1,134 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from page_loader.journal import Journal, journal_path_for
+from page_loader.manifest import Manifest, manifest_path_for
+from page_loader.page_loader import (FileNamer, download, fetch_resource,
+                                     logger)
+
+SHARED_DIR_NAME = "shared_files"
+
+
+class ResourceStore:
+    """Общее хранилище ресурсов для нескольких страниц.
+
+    Каждый URL скачивается не больше одного раза за время жизни хранилища,
+    даже если его одновременно запрашивают несколько потоков. namer
+    (page_loader.page_loader.FileNamer) выдаёт имена файлов всем
+    страницам хранилища.
+    """
+
+    def __init__(self, directory):
+        self.directory = str(directory)
+        self._lock = threading.Lock()
+        self._results = {}
+        self._stylesheets = set()
+        self._manifest = None
+        self._journal = None
+        self.namer = FileNamer()
+
+    @property
+    def manifest(self):
+        """Манифест хранилища для инкрементального режима"""
+        with self._lock:
+            if self._manifest is None:
+                self._manifest = Manifest.load(
+                    manifest_path_for(self.directory))
+            return self._manifest
+
+    @property
+    def journal(self):
+        """Журнал хранилища для продолжения прерванной загрузки"""
+        with self._lock:
+            if self._journal is None:
+                self._journal = Journal.load(
+                    journal_path_for(self.directory))
+            return self._journal
+
+    def fetch(self, full_url, resource_path, **options):
+        """Скачивает ресурс или возвращает результат прошлой загрузки.
+
+        Совместима с fetch_resource() и передаётся в download() как store.
+        """
+        with self._lock:
+            result = self._results.get(full_url)
+            owner = result is None
+            if owner:
+                result = self._results[full_url] = Future()
+
+        if not owner:
+            logger.debug("Ресурс %s уже есть в общем хранилище", full_url)
+            return result.result()
+
+        try:
+            ok = fetch_resource(full_url, resource_path, **options)
+        except BaseException as e:
+            result.set_exception(e)
+            raise
+        deadline = options.get('deadline')
+        if not ok and deadline is not None and deadline.remaining() <= 0:
+            # Ресурс отменён по сроку этой страницы, а не сломан:
+            # другие страницы попробуют скачать его сами
+            with self._lock:
+                del self._results[full_url]
+        result.set_result(ok)
+        return ok
+
+    def claim_stylesheet(self, url):
+        """True, если CSS-файл ещё не обрабатывала другая страница"""
+        with self._lock:
+            if url in self._stylesheets:
+                return False
+            self._stylesheets.add(url)
+            return True
+
+    def __len__(self):
+        with self._lock:
+            return sum(1 for result in self._results.values()
+                       if result.done() and not result.exception()
+                       and result.result())
+
+
+def read_urls(path):
+    """Читает URL из файла: по одному в строке, '#' - комментарий"""
+    with open(path, encoding='utf-8') as f:
+        lines = (line.split('#', 1)[0].strip() for line in f)
+        return [line for line in lines if line]
+
+
+def download_batch(urls, output_dir=None, store=None, page_workers=1,
+                   **options):
+    """Скачивает несколько страниц с общим хранилищем ресурсов.
+
+    Все страницы сохраняются в output_dir, а ресурсы - один раз
+    в store (по умолчанию <output_dir>/shared_files).
+    page_workers - число страниц, скачиваемых одновременно; остальные
+    параметры передаются в download().
+    Возвращает словарь URL -> путь к HTML или None, если страницу
+    скачать не удалось.
+    """
+    if page_workers < 1:
+        raise ValueError(
+            f"page_workers должно быть не меньше 1, получено {page_workers}")
+    output_dir = os.getcwd() if output_dir is None else output_dir
+    if store is None:
+        store = ResourceStore(os.path.join(output_dir, SHARED_DIR_NAME))
+    urls = list(dict.fromkeys(urls))
+
+    def download_page(url):
+        try:
+            return download(url, output_dir, store=store, **options)
+        except Exception as e:
+            logger.error("Не удалось скачать страницу %s: %s", url, e)
+            return None
+
+    if page_workers == 1 or len(urls) <= 1:
+        paths = [download_page(url) for url in urls]
+    else:
+        with ThreadPoolExecutor(max_workers=page_workers) as executor:
+            paths = list(executor.map(download_page, urls))
+
+    logger.info("Скачано страниц: %s из %s, ресурсов в хранилище: %s",
+                sum(p is not None for p in paths), len(urls), len(store))
+    return dict(zip(urls, paths))
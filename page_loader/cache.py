@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+from page_loader.defaults import DEFAULT_MAX_BYTES
+
+INDEX_NAME = "index.json"
+OBJECTS_DIR = "objects"
+
+
+def file_sha256(path):
+    """Считает sha256 файла, не читая его целиком в память"""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _place(src, dest, link):
+    """Кладёт src в dest жёсткой ссылкой или, если нельзя, копией"""
+    tmp_path = f"{dest}.part"
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+    if link:
+        try:
+            os.link(src, tmp_path)
+        except OSError:
+            shutil.copyfile(src, tmp_path)
+    else:
+        shutil.copyfile(src, tmp_path)
+    os.replace(tmp_path, dest)
+
+
+class ResourceCache:
+    """Постоянный локальный кеш ресурсов с адресацией по содержимому.
+
+    Ресурсы ищутся по URL, а хранятся по sha256 содержимого, поэтому
+    одинаковые файлы с разных URL занимают место один раз. При превышении
+    max_bytes вытесняются давно не использованные объекты (LRU).
+    Файлы отдаются жёсткими ссылками (link=True) или копиями. Кеш
+    считает ресурсы неизменными: устаревшие версии не перепроверяются.
+    Для фильтра по типу рядом с URL хранится Content-Type ответа.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES, link=True):
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+        self.link = link
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._urls = {}
+        self._types = {}
+        self._objects = OrderedDict()
+        os.makedirs(os.path.join(self.directory, OBJECTS_DIR), exist_ok=True)
+        self._load()
+
+    def _index_path(self):
+        return os.path.join(self.directory, INDEX_NAME)
+
+    def _object_path(self, sha256):
+        return os.path.join(self.directory, OBJECTS_DIR, sha256[:2], sha256)
+
+    def _load(self):
+        try:
+            with open(self._index_path(), encoding='utf-8') as f:
+                index = json.load(f)
+            urls = dict(index['urls'])
+            types = dict(index.get('types', {}))
+            objects = OrderedDict((sha, size) for sha, size
+                                  in index['objects'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+        # Объекты могли удалить вручную: оставляем только существующие
+        self._objects = OrderedDict(
+            (sha, size) for sha, size in objects.items()
+            if os.path.exists(self._object_path(sha)))
+        self._urls = {url: sha for url, sha in urls.items()
+                      if sha in self._objects}
+        self._types = {url: content_type
+                       for url, content_type in types.items()
+                       if url in self._urls}
+
+    @property
+    def size(self):
+        """Суммарный размер объектов в кеше, байт"""
+        with self._lock:
+            return sum(self._objects.values())
+
+    def stats(self):
+        """Счётчики попаданий, промахов и вытеснений для настройки кеша"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions,
+                    'objects': len(self._objects),
+                    'bytes': sum(self._objects.values())}
+
+    def object_size(self, url):
+        """Размер закешированного ресурса в байтах или None"""
+        with self._lock:
+            sha256 = self._urls.get(url)
+            return None if sha256 is None else self._objects.get(sha256)
+
+    def content_type(self, url):
+        """Content-Type закешированного ресурса или None, если неизвестен"""
+        with self._lock:
+            return self._types.get(url)
+
+    def get(self, url, dest_path):
+        """Кладёт закешированный ресурс в dest_path; False при промахе"""
+        with self._lock:
+            sha256 = self._urls.get(url)
+            if sha256 is None:
+                self.misses += 1
+                return False
+            try:
+                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                _place(self._object_path(sha256), dest_path, self.link)
+            except FileNotFoundError:
+                self._forget(sha256)
+                self.misses += 1
+                return False
+            self._objects.move_to_end(sha256)
+            self.hits += 1
+            return True
+
+    def put(self, url, path, sha256=None, content_type=None):
+        """Добавляет в кеш файл ресурса, скачанного по url"""
+        size = os.path.getsize(path)
+        if size > self.max_bytes:
+            return
+        sha256 = sha256 or file_sha256(path)
+        with self._lock:
+            if sha256 not in self._objects:
+                object_path = self._object_path(sha256)
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                _place(path, object_path, self.link)
+                self._objects[sha256] = size
+            self._objects.move_to_end(sha256)
+            self._urls[url] = sha256
+            if content_type:
+                self._types[url] = content_type
+            else:
+                self._types.pop(url, None)
+            self._evict()
+
+    def _evict(self):
+        total = sum(self._objects.values())
+        while total > self.max_bytes and self._objects:
+            sha256, size = self._objects.popitem(last=False)
+            self._forget(sha256)
+            total -= size
+            self.evictions += 1
+
+    def _forget(self, sha256):
+        self._objects.pop(sha256, None)
+        self._urls = {url: sha for url, sha in self._urls.items()
+                      if sha != sha256}
+        self._types = {url: content_type
+                       for url, content_type in self._types.items()
+                       if url in self._urls}
+        try:
+            os.remove(self._object_path(sha256))
+        except FileNotFoundError:
+            pass
+
+    def save(self):
+        """Атомарно записывает индекс кеша на диск"""
+        with self._lock:
+            data = json.dumps({'urls': self._urls, 'types': self._types,
+                               'objects': list(self._objects.items())})
+        tmp_path = f"{self._index_path()}.part"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, self._index_path())
@@ -1,25 +1,267 @@
 import argparse
+import logging
 import os
 import sys
 
-from page_loader.page_loader import download, logger
+from page_loader.defaults import (DEFAULT_MAX_BYTES, DEFAULT_POOL_MAXSIZE,
+                                  DEFAULT_TIMEOUT, OUTPUT_FORMATS,
+                                  OVERSIZE_POLICIES, PARSERS, REWRITE_MODES)
+
+logger = logging.getLogger(__name__)
 
 
 def main():
     parser = argparse.ArgumentParser(
         description="Page Loader: скачивает веб-страницу")
-    parser.add_argument("url", help="URL страницы для загрузки")
+    parser.add_argument("url", nargs="*",
+                        help="URL страницы для загрузки; при нескольких "
+                             "URL ресурсы сохраняются в общую папку "
+                             "shared_files")
+    parser.add_argument("-i", "--input-file",
+                        help="Файл со списком URL, по одному в строке")
+    parser.add_argument("-p", "--pages", type=int, default=1,
+                        help="Число страниц, скачиваемых одновременно "
+                             "в пакетном режиме")
+    parser.add_argument("-d", "--depth", type=int, default=None,
+                        help="Зеркалировать сайт: переходить по ссылкам "
+                             "на страницы того же хоста до указанной "
+                             "глубины")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="Не больше стольких запросов в секунду "
+                             "к одному хосту")
+    parser.add_argument("--retries", type=int, default=0,
+                        help="Число повторов запроса при сетевых ошибках "
+                             "и ответах 429/5xx")
+    parser.add_argument("--backoff", type=float, default=0.5,
+                        help="Базовая задержка перед повтором, сек; "
+                             "удваивается с каждой попыткой")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="Таймаут соединения и чтения для каждого "
+                             "запроса, сек (по умолчанию %s и %s)"
+                             % DEFAULT_TIMEOUT)
+    parser.add_argument("--deadline", type=float, default=None,
+                        help="Срок на страницу со всеми ресурсами, сек; "
+                             "по истечении сохраняется то, что успело "
+                             "скачаться")
     parser.add_argument("-o", "--output", help="Директория для сохранения",
                         default=os.getcwd())
+    parser.add_argument("-f", "--format", choices=OUTPUT_FORMATS,
+                        default="files",
+                        help="files - HTML и папка ресурсов, zip - один "
+                             "архив со страницей и ресурсами")
+    parser.add_argument("--compress", action="store_true",
+                        help="Сохранять HTML, CSS, JS и другие текстовые "
+                             "файлы сжатыми gzip (<имя>.gz) с индексом "
+                             "compressed.json")
+    parser.add_argument("--accept-encoding",
+                        help="Сжатия, которые может применить сервер "
+                             "(по умолчанию все, что умеет распаковать "
+                             "urllib3); identity - без сжатия")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="Число потоков для загрузки ресурсов")
+    parser.add_argument("--max-size", type=int, default=None,
+                        help="Максимальный размер ресурса в байтах")
+    parser.add_argument("--oversize", choices=OVERSIZE_POLICIES,
+                        default="skip",
+                        help="Что делать с ресурсом больше --max-size: "
+                             "пропустить или обрезать")
+    parser.add_argument("--tags", type=split_list,
+                        help="Скачивать ресурсы только этих тегов, "
+                             "через запятую: img,script,link")
+    parser.add_argument("--link-rels", type=split_list,
+                        help="Скачивать <link> только с этими rel, "
+                             "например stylesheet,icon")
+    parser.add_argument("--extensions", type=split_list,
+                        help="Скачивать только файлы с этими расширениями")
+    parser.add_argument("--mime-types", type=split_list,
+                        help="Скачивать только ресурсы этих типов, "
+                             "например image/*,text/css")
+    parser.add_argument("--head", action="store_true",
+                        help="Проверять тип и размер ресурса запросом "
+                             "HEAD до скачивания")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Обновлять ранее скачанную страницу на месте, "
+                             "не скачивая неизменившиеся ресурсы")
+    parser.add_argument("--resume", action="store_true",
+                        help="Продолжить прерванную загрузку: докачать "
+                             "только недостающие ресурсы")
+    parser.add_argument("--parse-processes", type=int, default=None,
+                        help="Разбирать HTML в стольких процессах; "
+                             "полезно при пакетной загрузке многих "
+                             "страниц на многоядерной машине")
+    parser.add_argument("--parser", choices=PARSERS, default="html.parser",
+                        help="Парсер HTML; auto - lxml, если установлен")
+    parser.add_argument("--rewrite", choices=REWRITE_MODES,
+                        default="prettify",
+                        help="Как сохранять HTML: prettify или minimal - "
+                             "менять только ссылки на ресурсы")
+    parser.add_argument("--log-level", default="INFO",
+                        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="Уровень логирования в stderr")
+    parser.add_argument("--report",
+                        help="Записать в JSON-файл длительности этапов, "
+                             "объём данных и статусы ресурсов")
+    parser.add_argument("--cache-dir",
+                        help="Директория локального кеша ресурсов, общего "
+                             "для запусков")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_BYTES,
+                        help="Максимальный размер кеша в байтах")
 
     args = parser.parse_args()
+    # Настройка логирования для читаемого вывода
+    logging.basicConfig(level=args.log_level,
+                        format="%(levelname)s: %(message)s",
+                        stream=sys.stderr)
+    urls = list(args.url)
+    if args.input_file:
+        from page_loader.batch import read_urls
+        try:
+            urls.extend(read_urls(args.input_file))
+        except OSError as e:
+            parser.error(f"не удалось прочитать {args.input_file}: {e}")
+    if not urls:
+        parser.error("укажите URL или --input-file")
+    if args.depth is not None and (args.depth < 0 or len(urls) > 1):
+        parser.error("--depth должна быть неотрицательной и работает "
+                     "с одним URL")
+    if args.format != "files" and (len(urls) > 1 or args.input_file
+                                   or args.depth is not None
+                                   or args.incremental or args.resume):
+        parser.error("--format zip работает с одним URL без --depth "
+                     "и --incremental/--resume")
+    if args.compress and (args.format != "files" or args.incremental
+                          or args.resume or args.cache_dir):
+        parser.error("--compress несовместим с --format zip, "
+                     "--incremental, --resume и --cache-dir")
+    if args.head and args.mime_types is None and args.max_size is None:
+        parser.error("--head работает вместе с --mime-types или --max-size")
+    if args.rate is not None and args.rate <= 0:
+        parser.error("--rate должна быть больше 0")
+    if args.retries < 0 or args.backoff < 0:
+        parser.error("--retries и --backoff не могут быть отрицательными")
+    if any(value is not None and value <= 0
+           for value in (args.timeout, args.deadline)):
+        parser.error("--timeout и --deadline должны быть больше 0")
+    if args.pages < 1:
+        parser.error("--pages должно быть не меньше 1")
+    if args.workers < 1:
+        parser.error("--workers должно быть не меньше 1")
+    if args.parse_processes is not None and args.parse_processes < 1:
+        parser.error("--parse-processes должно быть не меньше 1")
+    if args.max_size is not None and args.max_size < 0:
+        parser.error("--max-size не может быть отрицательным")
+    if args.cache_size < 0:
+        parser.error("--cache-size не может быть отрицательным")
+
+    # requests, bs4 и остальное загружаем только после проверки
+    # аргументов, чтобы --help и ошибки в опциях не ждали импорта
+    from page_loader.batch import download_batch
+    from page_loader.cache import ResourceCache
+    from page_loader.filters import ResourceFilter
+    from page_loader.metrics import Metrics
+    from page_loader.mirror import mirror
+    from page_loader.page_loader import download
+    from page_loader.parallel import ParsePool
+    from page_loader.ratelimit import HostRateLimiter
+    from page_loader.retry import RetryPolicy
+    from page_loader.session import make_session
+    from page_loader.storage import CompressedStorage
 
+    # Пул соединений к хосту не меньше числа потоков, иначе лишние
+    # соединения будут открываться и закрываться на каждый запрос
+    session = make_session(
+        pool_maxsize=max(args.workers * args.pages, DEFAULT_POOL_MAXSIZE),
+        accept_encoding=args.accept_encoding)
+    options = {"max_workers": args.workers, "session": session,
+               "max_size": args.max_size, "on_oversize": args.oversize,
+               "incremental": args.incremental, "resume": args.resume,
+               "parser": args.parser,
+               "rewrite": args.rewrite,
+               "timeout": args.timeout or DEFAULT_TIMEOUT,
+               "deadline": args.deadline, "output_format": args.format}
+    if any(value is not None for value in (args.tags, args.link_rels,
+                                           args.extensions,
+                                           args.mime_types)) or args.head:
+        options["resource_filter"] = ResourceFilter(
+            args.tags, args.link_rels, args.extensions, args.mime_types,
+            args.head)
+    if args.compress:
+        options["storage"] = CompressedStorage(args.output)
+    if args.retries:
+        options["retry"] = RetryPolicy(attempts=args.retries + 1,
+                                       backoff=args.backoff)
+    if args.rate is not None:
+        options["rate_limiter"] = HostRateLimiter(args.rate)
+    if args.report:
+        options["metrics"] = Metrics()
+    if args.cache_dir:
+        try:
+            options["cache"] = ResourceCache(args.cache_dir, args.cache_size)
+        except OSError as e:
+            parser.error(f"не удалось открыть кеш {args.cache_dir}: {e}")
+    if args.parse_processes:
+        options["parse_pool"] = ParsePool(args.parse_processes)
+
+    # Печатаем пути файлов на диске: сжатая страница лежит в <имя>.html.gz
+    show = options["storage"].location if args.compress else str
     try:
-        file_path = download(args.url, args.output)
-        logger.info(f"Страница успешно загружена в: {file_path}")
-        print(file_path)
+        if args.depth is not None:
+            run_batch(mirror, urls[0], args.output, args.pages, options,
+                      show, depth=args.depth)
+            return
+        if len(urls) > 1 or args.input_file:
+            run_batch(download_batch, urls, args.output, args.pages,
+                      options, show)
+            return
+
+        try:
+            file_path = show(download(urls[0], args.output, **options))
+            logger.info("Страница успешно загружена в: %s", file_path)
+            print(file_path)
+        except Exception as e:
+            logger.error("Ошибка: %s", e)
+            sys.exit(1)
+    finally:
+        if args.parse_processes:
+            options["parse_pool"].close()
+        if args.cache_dir:
+            logger.info("Статистика кеша: %s", options['cache'].stats())
+        if args.report:
+            write_report(options["metrics"], args.report)
+
+
+def split_list(value):
+    """Разбирает значение опции со списком через запятую"""
+    return [item for item in value.split(',') if item.strip()]
+
+
+def write_report(metrics, path):
+    """Сохраняет отчёт о загрузке, не влияя на код завершения"""
+    try:
+        metrics.write_json(path)
+        logger.info("Отчёт сохранён: %s", path)
+    except OSError as e:
+        logger.error("Не удалось сохранить отчёт %s: %s", path, e)
+
+
+def run_batch(func, urls, output_dir, page_workers, options, show=str,
+              **kwargs):
+    """Загрузка нескольких страниц через download_batch() или mirror().
+
+    Печатает пути к страницам, пропущенные через show, и завершается с
+    кодом 1, если какую-то страницу скачать не удалось.
+    """
+    try:
+        results = func(urls, output_dir, page_workers=page_workers,
+                       **options, **kwargs)
     except Exception as e:
-        logger.error(f"Ошибка: {e}")
+        logger.error("Ошибка: %s", e)
+        sys.exit(1)
+
+    for file_path in results.values():
+        if file_path is not None:
+            print(show(file_path))
+    if None in results.values():
         sys.exit(1)
 
 
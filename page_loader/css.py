@@ -0,0 +1,34 @@
+import re
+
+CSS_EXTENSION = '.css'
+
+# Комментарии пропускаем, чтобы не скачивать закомментированные ссылки
+_CSS_REF = re.compile(
+    r'/\*.*?\*/'
+    r'''|url\(\s*(?:"([^"]*)"|'([^']*)'|([^)\s"']+))\s*\)'''
+    r'''|@import\s+(?:"([^"]*)"|'([^']*)')''',
+    re.DOTALL | re.IGNORECASE)
+
+
+def split_css(text):
+    """Разбивает CSS на части, где нечётные элементы - ссылки.
+
+    Находит url(...) и @import "..."; ''.join(parts) даёт исходный
+    текст, поэтому ссылки можно заменить, не трогая остальное.
+    """
+    parts = []
+    position = 0
+    for match in _CSS_REF.finditer(text):
+        group = next((i for i in range(1, 6) if match.group(i)), None)
+        if group is None:
+            continue
+        start, end = match.span(group)
+        parts.extend((text[position:start], match.group(group)))
+        position = end
+    parts.append(text[position:])
+    return parts
+
+
+def is_stylesheet(filename):
+    """Проверяет по имени файла, что ресурс - таблица стилей"""
+    return filename.lower().endswith(CSS_EXTENSION)
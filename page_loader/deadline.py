@@ -0,0 +1,45 @@
+import time
+
+import requests
+
+
+class DeadlineExceeded(requests.RequestException):
+    """Время, отведённое на загрузку страницы, истекло"""
+
+
+class Deadline:
+    """Общий срок загрузки страницы со всеми ресурсами"""
+
+    def __init__(self, seconds):
+        if seconds <= 0:
+            raise ValueError(f"Срок должен быть больше 0, получено {seconds}")
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def coerce(cls, deadline):
+        """Превращает число секунд в Deadline; None и Deadline - как есть"""
+        if deadline is None or isinstance(deadline, cls):
+            return deadline
+        return cls(deadline)
+
+    def remaining(self):
+        """Сколько секунд осталось до срока"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def check(self, url):
+        """Выбрасывает DeadlineExceeded, если срок уже истёк"""
+        if self.remaining() <= 0:
+            raise DeadlineExceeded(
+                f"Истёк срок {self.seconds} с, запрос {url} отменён")
+
+    def clamp(self, timeout):
+        """Ограничивает таймауты запроса оставшимся временем"""
+        # Нулевой таймаут requests не принимает
+        remaining = max(self.remaining(), 0.001)
+        if timeout is None:
+            return remaining
+        if isinstance(timeout, tuple):
+            return tuple(remaining if t is None else min(t, remaining)
+                         for t in timeout)
+        return min(timeout, remaining)
@@ -0,0 +1,16 @@
+# Значения по умолчанию и допустимые значения параметров загрузки.
+# Модуль не импортирует requests и bs4, поэтому CLI может строить
+# справку и проверять аргументы, не загружая их.
+
+# Таймауты одного запроса по умолчанию: (соединение, чтение), секунды
+DEFAULT_TIMEOUT = (10, 30)
+OVERSIZE_POLICIES = ('skip', 'truncate')
+OUTPUT_FORMATS = ('files', 'zip')
+PARSERS = ('auto', 'html.parser', 'lxml')
+REWRITE_MODES = ('prettify', 'minimal')
+# Число пулов (хостов), которые держит адаптер, и число keep-alive
+# соединений в пуле одного хоста
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+# Размер кеша ресурсов по умолчанию, байт
+DEFAULT_MAX_BYTES = 1024 ** 3
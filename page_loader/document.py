@@ -0,0 +1,329 @@
+import importlib.util
+import re
+from html import escape, unescape
+from html.parser import HTMLParser
+
+from bs4 import BeautifulSoup
+
+from page_loader.css import split_css
+from page_loader.defaults import PARSERS, REWRITE_MODES
+
+# Теги с ресурсами и атрибуты, в которых лежат ссылки
+RESOURCE_ATTRS = {
+    'img': ('src', 'srcset'),
+    'script': ('src',),
+    'link': ('href',),
+    'source': ('src', 'srcset'),
+    'video': ('src', 'poster'),
+    'audio': ('src',),
+}
+# Атрибуты со списком адаптивных изображений "url 2x, url 640w"
+SRCSET_ATTRS = ('srcset',)
+# Ссылки на другие страницы
+ANCHOR_ATTRS = {'a': 'href'}
+
+
+def resolve_parser(parser):
+    """Выбирает парсер BeautifulSoup: 'auto' означает lxml, если он есть"""
+    if parser not in PARSERS:
+        raise ValueError(f"Неизвестный парсер: {parser}")
+    if parser == 'auto':
+        return 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
+    return parser
+
+
+def make_document(html, parser='html.parser', rewrite='prettify'):
+    """Создаёт документ для поиска и замены ссылок на ресурсы.
+
+    rewrite='prettify' разбирает страницу в дерево BeautifulSoup и
+    сохраняет её через prettify(); rewrite='minimal' не строит дерево и
+    меняет в исходном тексте только значения переписанных атрибутов.
+    """
+    if rewrite not in REWRITE_MODES:
+        raise ValueError(f"Неизвестный режим перезаписи: {rewrite}")
+    if rewrite == 'minimal':
+        return SpanDocument(html)
+    return SoupDocument(html, resolve_parser(parser))
+
+
+def split_srcset(value):
+    """Разбивает srcset на части, где нечётные элементы - URL.
+
+    ''.join(parts) даёт исходное значение, дескрипторы ширины и
+    плотности остаются в чётных частях.
+    """
+    parts = []
+    literal_start = 0
+    position = 0
+    length = len(value)
+    while position < length:
+        while position < length and (value[position].isspace()
+                                     or value[position] == ','):
+            position += 1
+        if position == length:
+            break
+        start = position
+        while position < length and not value[position].isspace():
+            position += 1
+        end = position
+        # Запятые в конце URL отделяют кандидатов без дескрипторов
+        while end > start and value[end - 1] == ',':
+            end -= 1
+        parts.extend((value[literal_start:start], value[start:end]))
+        literal_start = end
+        if end < position:
+            continue
+        depth = 0
+        while position < length:
+            char = value[position]
+            if char == ',' and depth <= 0:
+                break
+            depth += {'(': 1, ')': -1}.get(char, 0)
+            position += 1
+    parts.append(value[literal_start:])
+    return parts
+
+
+class _Field:
+    """Значение атрибута или текст <style> с несколькими ссылками.
+
+    parts - результат split_srcset() или split_css(); attr=None
+    означает текст тега.
+    """
+
+    def __init__(self, ref, attr, parts):
+        self.ref = ref
+        self.attr = attr
+        self.parts = parts
+
+
+class _Slot:
+    """Одна ссылка внутри _Field"""
+
+    def __init__(self, field, index):
+        self.field = field
+        self.index = index
+
+
+def _field_links(ref, tag, attr, value, split):
+    field = _Field(ref, attr, split(value))
+    return [(_Slot(field, index), tag, attr, field.parts[index])
+            for index in range(1, len(field.parts), 2)]
+
+
+def _tag_links(ref, tag, attrs):
+    """Ссылки на ресурсы в атрибутах тега, attrs - словарь атрибутов"""
+    found = []
+    for attr in RESOURCE_ATTRS.get(tag, ()):
+        value = attrs.get(attr)
+        if value is None:
+            continue
+        if attr in SRCSET_ATTRS:
+            found.extend(_field_links(ref, tag, attr, value, split_srcset))
+        else:
+            found.append((ref, tag, attr, value))
+    if attrs.get('style'):
+        found.extend(_field_links(ref, tag, 'style', attrs['style'],
+                                  split_css))
+    return found
+
+
+class _Document:
+    """Общая замена ссылок для документов.
+
+    Ссылка из links() - это либо тег с атрибутом, либо _Slot внутри
+    srcset, style или <style>; во втором случае значение собирается
+    заново из частей с заменённой ссылкой.
+    """
+
+    def get_attr(self, ref, name):
+        """Значение другого атрибута тега из links(), например rel"""
+        if isinstance(ref, _Slot):
+            if ref.field.attr is None:
+                return None
+            ref = ref.field.ref
+        return self._get_attr(ref, name)
+
+    def set_link(self, ref, attr, value):
+        if not isinstance(ref, _Slot):
+            self._set_attr(ref, attr, value)
+            return
+        field = ref.field
+        field.parts[ref.index] = value
+        if field.attr is None:
+            self._set_text(field.ref, ''.join(field.parts))
+        else:
+            self._set_attr(field.ref, field.attr, ''.join(field.parts))
+
+
+class SoupDocument(_Document):
+    """Документ на дереве BeautifulSoup"""
+
+    def __init__(self, html, parser):
+        self.soup = BeautifulSoup(html, parser)
+
+    def links(self):
+        """Возвращает (ссылка на тег, имя тега, атрибут, значение)"""
+        found = []
+        for tag in self.soup.find_all(True):
+            found.extend(_tag_links(tag, tag.name, tag.attrs))
+            if tag.name == 'style' and tag.string:
+                found.extend(_field_links(tag, 'style', None,
+                                          str(tag.string), split_css))
+        return found
+
+    def anchors(self):
+        """Как links(), но для ссылок <a href> на другие страницы"""
+        return [(tag, tag.name, 'href', tag.get('href'))
+                for tag in self.soup.find_all('a')]
+
+    def _get_attr(self, tag, name):
+        value = tag.get(name)
+        # rel и class BeautifulSoup возвращает списком
+        return ' '.join(value) if isinstance(value, list) else value
+
+    def _set_attr(self, tag, attr, value):
+        tag[attr] = value
+
+    def _set_text(self, tag, text):
+        # Сохраняем класс строки, чтобы CSS не экранировался при выводе
+        tag.string.replace_with(type(tag.string)(text))
+
+    def render(self):
+        return self.soup.prettify()
+
+
+class _LinkScanner(HTMLParser):
+    """Находит теги со ссылками, тексты <style> и их позиции в тексте"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tags = []
+        self.styles = []
+        self._in_style = False
+
+    def handle_starttag(self, tag, attrs):
+        self._in_style = tag == 'style'
+        if (tag in RESOURCE_ATTRS or tag in ANCHOR_ATTRS
+                or any(name == 'style' for name, _ in attrs)):
+            # Как и BeautifulSoup, при повторе атрибута берём последнее
+            # значение
+            self.tags.append((self.getpos(), self.get_starttag_text(), tag,
+                              dict(attrs)))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        self._in_style = False
+
+    def handle_endtag(self, tag):
+        self._in_style = False
+
+    def handle_data(self, data):
+        if self._in_style:
+            self.styles.append((self.getpos(), data))
+
+
+_TAG_NAME = re.compile(r'<[^\s/>]+')
+_ATTRIBUTE = re.compile(
+    r'''[\s/]*([^\s/>"'=][^\s/>"'=]*)'''
+    r'''(?:\s*=\s*("[^"]*"|'[^']*'|[^\s>"'`=<]*))?''')
+
+
+def _value_span(tag_text, attr):
+    """Находит в тексте открывающего тега позицию значения атрибута.
+
+    Возвращает (начало, конец, кавычка) для последнего вхождения
+    атрибута или None, если атрибута нет.
+    """
+    span = None
+    match = _TAG_NAME.match(tag_text)
+    position = match.end() if match else 0
+    while True:
+        match = _ATTRIBUTE.match(tag_text, position)
+        if not match or match.end() == position:
+            return span
+        position = match.end()
+        if match.group(1).lower() != attr or match.group(2) is None:
+            continue
+        start, end = match.span(2)
+        quote = tag_text[start] if tag_text[start] in '"\'' else ''
+        if quote:
+            start, end = start + 1, end - 1
+        span = (start, end, quote)
+
+
+class SpanDocument(_Document):
+    """Документ, который переписывает только изменённые атрибуты.
+
+    Страница не сериализуется заново: в исходном тексте заменяются
+    лишь значения атрибутов, поэтому остальной HTML сохраняется как есть.
+    """
+
+    def __init__(self, html):
+        self.html = html
+        self._replacements = {}
+        scanner = _LinkScanner()
+        scanner.feed(html)
+        scanner.close()
+        line_starts = [0]
+        line_starts.extend(m.end() for m in re.finditer('\n', html))
+        found = []
+        self._anchors = []
+        for (line, column), text, tag, attrs in scanner.tags:
+            start = line_starts[line - 1] + column
+            if tag in ANCHOR_ATTRS:
+                attr = ANCHOR_ATTRS[tag]
+                self._anchors.append(((start, text), tag, attr,
+                                      attrs.get(attr)))
+            found.extend((start, link)
+                         for link in _tag_links((start, text), tag, attrs))
+        for (line, column), css in scanner.styles:
+            start = line_starts[line - 1] + column
+            found.extend((start, link) for link in _field_links(
+                (start, css), 'style', None, css, split_css))
+        # Теги и тексты <style> собраны отдельно: восстанавливаем порядок
+        # документа (сортировка устойчива и не меняет порядок внутри тега)
+        found.sort(key=lambda item: item[0])
+        self._links = [link for _, link in found]
+
+    def links(self):
+        """Возвращает (ссылка на тег, имя тега, атрибут, значение)"""
+        return list(self._links)
+
+    def anchors(self):
+        """Как links(), но для ссылок <a href> на другие страницы"""
+        return list(self._anchors)
+
+    def _get_attr(self, ref, name):
+        _, tag_text = ref
+        span = _value_span(tag_text, name)
+        if span is None:
+            return None
+        start, end, _ = span
+        return unescape(tag_text[start:end])
+
+    def _set_attr(self, ref, attr, value):
+        tag_start, tag_text = ref
+        span = _value_span(tag_text, attr)
+        if span is None:
+            return
+        start, end, quote = span
+        new_value = escape(value, quote=True)
+        if not quote:
+            new_value = f'"{new_value}"'
+        self._replacements[tag_start + start] = (tag_start + end, new_value)
+
+    def _set_text(self, ref, text):
+        start, original = ref
+        self._replacements[start] = (start + len(original), text)
+
+    def render(self):
+        parts = []
+        position = 0
+        for start in sorted(self._replacements):
+            end, value = self._replacements[start]
+            parts.append(self.html[position:start])
+            parts.append(value)
+            position = end
+        parts.append(self.html[position:])
+        return ''.join(parts)
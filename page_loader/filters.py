@@ -0,0 +1,72 @@
+import os
+from urllib.parse import urlparse
+
+import requests
+
+# rel ссылок <link>, нужных для отображения страницы
+PAGE_LINK_RELS = ('stylesheet', 'icon', 'shortcut', 'apple-touch-icon',
+                  'manifest', 'preload', 'modulepreload')
+
+
+class ResourceFilteredError(requests.RequestException):
+    """Ресурс отброшен фильтром и не скачивался"""
+
+
+def _normalize(values):
+    if values is None:
+        return None
+    return frozenset(value.strip().lower().lstrip('.') for value in values)
+
+
+class ResourceFilter:
+    """Отбор ресурсов страницы до и во время загрузки.
+
+    tags - имена тегов (img, script, link...), rels - значения rel для
+    <link>, extensions - расширения файлов в URL, mime_types - типы из
+    Content-Type, в том числе с маской ('image/*'). None снимает
+    ограничение. Ресурс без расширения не проходит фильтр extensions,
+    а ответ без Content-Type проходит фильтр mime_types.
+    head=True перед загрузкой отправляет HEAD и отбрасывает ресурс по
+    Content-Type и Content-Length, не передавая тело.
+    """
+
+    def __init__(self, tags=None, rels=None, extensions=None,
+                 mime_types=None, head=False):
+        self.tags = _normalize(tags)
+        self.rels = _normalize(rels)
+        self.extensions = _normalize(extensions)
+        self.mime_types = _normalize(mime_types)
+        self.head = head
+
+    def accepts_link(self, tag, rel, url):
+        """Проверка ссылки по тегу, rel и расширению.
+
+        tag=None означает ссылку из CSS-файла: для неё проверяется
+        только расширение.
+        """
+        if tag is not None:
+            if self.tags is not None and tag not in self.tags:
+                return False
+            if self.rels is not None and tag == 'link' and \
+                    not self.rels.intersection((rel or '').lower().split()):
+                return False
+        if self.extensions is not None:
+            extension = os.path.splitext(urlparse(url).path)[1]
+            if extension.lstrip('.').lower() not in self.extensions:
+                return False
+        return True
+
+    def accepts_type(self, content_type):
+        """Проверка Content-Type ответа"""
+        if self.mime_types is None or not content_type:
+            return True
+        mime_type = content_type.split(';', 1)[0].strip().lower()
+        return (mime_type in self.mime_types
+                or f"{mime_type.split('/', 1)[0]}/*" in self.mime_types)
+
+    def check_response(self, headers, resource_url):
+        """Выбрасывает ResourceFilteredError, если тип не подходит"""
+        content_type = headers.get('Content-Type')
+        if not self.accepts_type(content_type):
+            raise ResourceFilteredError(
+                f"Тип {content_type} ресурса {resource_url} отфильтрован")
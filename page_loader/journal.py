@@ -0,0 +1,136 @@
+import contextlib
+import json
+import os
+import re
+import threading
+
+JOURNAL_SUFFIX = ".journal"
+
+_CONTENT_RANGE = re.compile(r'bytes\s+(\d+)-')
+_CONTENT_RANGE_TOTAL = re.compile(r'bytes\s+(?:\*|\d+-\d+)/(\d+)')
+
+
+def journal_path_for(resource_dir):
+    """Путь к журналу, лежащему рядом с директорией ресурсов"""
+    return os.path.normpath(str(resource_dir)) + JOURNAL_SUFFIX
+
+
+def content_range_start(headers):
+    """Начало диапазона из Content-Range ответа 206 или None"""
+    match = _CONTENT_RANGE.match(headers.get('Content-Range', ''))
+    return int(match.group(1)) if match else None
+
+
+def content_range_total(headers):
+    """Полный размер ресурса из Content-Range (206 или 416) или None"""
+    match = _CONTENT_RANGE_TOTAL.match(headers.get('Content-Range', ''))
+    return int(match.group(1)) if match else None
+
+
+def _validator(headers):
+    """Значение для If-Range: сильный ETag или Last-Modified"""
+    etag = headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return headers.get('Last-Modified')
+
+
+class Journal:
+    """Журнал загрузки страницы для продолжения после сбоя.
+
+    Записи дописываются в конец файла по одной строке JSON: начало
+    загрузки ресурса с его ETag или Last-Modified, завершение с размером
+    файла и отмена. Каждая запись сразу сбрасывается на диск, поэтому
+    после падения процесса журнал цел, а оборванная последняя строка
+    при чтении отрезается.
+    """
+
+    def __init__(self, path, entries=None):
+        self.path = path
+        self._entries = entries or {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        """Читает журнал; отсутствующий файл даёт пустой.
+
+        Оборванная строка удаляется из файла, чтобы следующая запись не
+        склеилась с ней.
+        """
+        entries = {}
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            data = b''
+        complete = data.rfind(b'\n') + 1
+        if complete < len(data):
+            with open(path, 'r+b') as f:
+                f.truncate(complete)
+        lines = data[:complete].decode('utf-8', 'replace').splitlines()
+        for line in lines:
+            try:
+                record = json.loads(line)
+                url, state = record['url'], record['state']
+            except (ValueError, TypeError, KeyError):
+                continue
+            if state == 'started':
+                entries[url] = {'validator': record.get('validator')}
+            elif state == 'done' and url in entries:
+                entries[url]['size'] = record.get('size')
+            elif state == 'discarded':
+                entries.pop(url, None)
+        return cls(path, entries)
+
+    def _append(self, record):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def completed(self, url, save_path):
+        """True, если ресурс скачан целиком и файл не изменился"""
+        with self._lock:
+            size = self._entries.get(url, {}).get('size')
+        if size is None:
+            return False
+        try:
+            return os.path.getsize(save_path) == size
+        except OSError:
+            return False
+
+    def range_headers(self, url, partial_size):
+        """Заголовки запроса остатка ресурса, если его можно докачать"""
+        with self._lock:
+            entry = self._entries.get(url, {})
+        validator = entry.get('validator')
+        if not partial_size or not validator or 'size' in entry:
+            return {}
+        return {'Range': f'bytes={partial_size}-', 'If-Range': validator}
+
+    def start(self, url, response_headers):
+        """Отмечает начало загрузки ресурса с нуля"""
+        validator = _validator(response_headers)
+        with self._lock:
+            self._entries[url] = {'validator': validator}
+            self._append({'url': url, 'state': 'started',
+                          'validator': validator})
+
+    def finish(self, url, size):
+        """Отмечает, что ресурс сохранён целиком"""
+        with self._lock:
+            self._entries.setdefault(url, {})['size'] = size
+            self._append({'url': url, 'state': 'done', 'size': size})
+
+    def discard(self, url):
+        """Забывает ресурс, чтобы в следующий раз скачать его с нуля"""
+        with self._lock:
+            if self._entries.pop(url, None) is not None:
+                self._append({'url': url, 'state': 'discarded'})
+
+    def remove(self):
+        """Удаляет журнал, когда страница скачана полностью"""
+        with self._lock:
+            self._entries.clear()
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self.path)
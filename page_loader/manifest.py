@@ -0,0 +1,88 @@
+import json
+import os
+import threading
+
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+def manifest_path_for(resource_dir):
+    """Путь к манифесту, лежащему рядом с директорией ресурсов"""
+    return os.path.normpath(str(resource_dir)) + MANIFEST_SUFFIX
+
+
+class Manifest:
+    """Сведения о скачанных ресурсах для инкрементальной загрузки.
+
+    Для каждого URL хранит имя файла, ETag, Last-Modified, размер и
+    sha256, чтобы следующий запуск мог отправить условный запрос.
+    """
+
+    def __init__(self, path, entries=None):
+        self.path = path
+        self._entries = entries or {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        """Читает манифест; отсутствующий или битый файл даёт пустой"""
+        try:
+            with open(path, encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = {}
+        if not isinstance(entries, dict):
+            entries = {}
+        return cls(path, entries)
+
+    def get(self, url):
+        with self._lock:
+            return self._entries.get(url)
+
+    def conditional_headers(self, url, save_path):
+        """Заголовки условного запроса, если сохранённый файл цел"""
+        entry = self.get(url)
+        if not entry:
+            return {}
+        try:
+            if os.path.getsize(save_path) != entry.get('size'):
+                return {}
+        except OSError:
+            return {}
+
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def record(self, url, save_path, response_headers, size, sha256):
+        """Запоминает сведения о только что сохранённом ресурсе"""
+        entry = {
+            'filename': os.path.basename(save_path),
+            'etag': response_headers.get('ETag'),
+            'last_modified': response_headers.get('Last-Modified'),
+            'size': size,
+            'sha256': sha256,
+        }
+        with self._lock:
+            self._entries[url] = entry
+
+    def discard(self, url):
+        """Забывает ресурс, чтобы в следующий раз скачать его целиком"""
+        with self._lock:
+            self._entries.pop(url, None)
+
+    def save(self):
+        """Атомарно записывает манифест на диск"""
+        with self._lock:
+            data = json.dumps(self._entries, ensure_ascii=False, indent=2,
+                              sort_keys=True)
+        tmp_path = f"{self.path}.part"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
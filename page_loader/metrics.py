@@ -0,0 +1,109 @@
+import contextlib
+import json
+import threading
+import time
+
+# Статусы ресурса, при которых байты пришли по сети
+TRANSFER_STATUSES = ('ok', 'truncated')
+
+
+class Metrics:
+    """Сбор длительностей этапов, объёма данных и статусов ресурсов.
+
+    hooks - функции hook(event, data), которые вызываются по завершении
+    этапа ('stage'), ресурса ('resource') и страницы ('page').
+    """
+
+    def __init__(self, hooks=()):
+        self.hooks = list(hooks)
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._resources = {}
+        self._pages = []
+
+    def _emit(self, event, data):
+        for hook in self.hooks:
+            hook(event, data)
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Замеряет длительность этапа; этапы с одним именем суммируются"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            with self._lock:
+                stage = self._stages.setdefault(name,
+                                                {'count': 0, 'seconds': 0.0})
+                stage['count'] += 1
+                stage['seconds'] += seconds
+            self._emit('stage', {'name': name, 'seconds': seconds})
+
+    def resource(self, url, status, seconds=0.0, size=0, retries=0,
+                 **extra):
+        """Записывает итог загрузки ресурса"""
+        data = {'url': url, 'status': status, 'seconds': seconds,
+                'bytes': size, 'retries': retries, **extra}
+        with self._lock:
+            self._resources[url] = data
+        self._emit('resource', data)
+
+    def page(self, url, seconds, path=None, error=None):
+        """Записывает итог загрузки страницы"""
+        data = {'url': url, 'seconds': seconds, 'path': path}
+        if error is not None:
+            data['error'] = error
+        with self._lock:
+            self._pages.append(data)
+        self._emit('page', data)
+
+    def report(self):
+        """Сводка в виде словаря, пригодного для JSON"""
+        with self._lock:
+            resources = list(self._resources.values())
+            stages = {name: dict(stage)
+                      for name, stage in self._stages.items()}
+            pages = list(self._pages)
+
+        statuses = {}
+        for resource in resources:
+            statuses[resource['status']] = \
+                statuses.get(resource['status'], 0) + 1
+        return {
+            'pages': pages,
+            'stages': stages,
+            'resources': resources,
+            'totals': {
+                'resources': len(resources),
+                'statuses': statuses,
+                'bytes_downloaded': sum(
+                    r['bytes'] for r in resources
+                    if r['status'] in TRANSFER_STATUSES),
+                'retries': sum(r['retries'] for r in resources),
+            },
+        }
+
+    def write_json(self, path):
+        """Сохраняет сводку в JSON-файл"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+
+
+class NullMetrics:
+    """Заглушка с интерфейсом Metrics для режима без инструментирования"""
+
+    _stage = contextlib.nullcontext()
+
+    def stage(self, name):
+        return self._stage
+
+    def resource(self, url, status, seconds=0.0, size=0, retries=0,
+                 **extra):
+        pass
+
+    def page(self, url, seconds, path=None, error=None):
+        pass
+
+
+NULL_METRICS = NullMetrics()
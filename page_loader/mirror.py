@@ -0,0 +1,130 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urldefrag, urljoin, urlparse
+
+from page_loader.batch import SHARED_DIR_NAME, ResourceStore
+from page_loader.document import SpanDocument
+from page_loader.page_loader import download, is_local_resource, logger
+from page_loader.ratelimit import HostRateLimiter
+from page_loader.storage import LOCAL_STORAGE
+
+# Расширения путей, которые считаются страницами, а не файлами
+PAGE_EXTENSIONS = ('', '.html', '.htm', '.php', '.asp', '.aspx', '.jsp')
+
+
+class Frontier:
+    """Очередь страниц для обхода без повторов, по уровням глубины"""
+
+    def __init__(self, url):
+        self._seen = {url}
+        self._queue = deque([(url, 0)])
+
+    def add(self, url, depth):
+        """Добавляет страницу, если она ещё не встречалась"""
+        if url in self._seen:
+            return False
+        self._seen.add(url)
+        self._queue.append((url, depth))
+        return True
+
+    def pop_level(self):
+        """Забирает все страницы ближайшего уровня глубины"""
+        if not self._queue:
+            return None, []
+        depth = self._queue[0][1]
+        level = []
+        while self._queue and self._queue[0][1] == depth:
+            level.append(self._queue.popleft()[0])
+        return depth, level
+
+
+def is_page_link(url, base_url):
+    """Проверяет, что ссылка ведёт на страницу того же хоста"""
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https'):
+        return False
+    extension = os.path.splitext(parsed.path)[1].lower()
+    return extension in PAGE_EXTENSIONS and is_local_resource(url, base_url)
+
+
+def mirror(url, output_dir=None, depth=1, page_workers=1, rate=None,
+           store=None, **options):
+    """Зеркалирует сайт: страницу url и страницы того же хоста до depth.
+
+    Страницы обходятся по уровням через очередь без повторов, до
+    page_workers одновременно и не чаще rate запросов (страниц и ресурсов)
+    в секунду к хосту. Все страницы сохраняются в output_dir, ресурсы - в общее
+    хранилище, а ссылки <a href> между скачанными страницами заменяются
+    на локальные файлы. Остальные параметры передаются в download().
+    Возвращает словарь URL -> путь к HTML или None при ошибке.
+    """
+    if depth < 0 or page_workers < 1 or (rate is not None and rate <= 0):
+        raise ValueError("depth не может быть отрицательной, page_workers "
+                         "должно быть не меньше 1, а rate - больше 0")
+    output_dir = os.getcwd() if output_dir is None else output_dir
+    if store is None:
+        store = ResourceStore(os.path.join(output_dir, SHARED_DIR_NAME))
+    url = urldefrag(url).url
+    if rate is not None:
+        options.setdefault('rate_limiter', HostRateLimiter(rate))
+    frontier = Frontier(url)
+    pages = {}
+
+    def download_page(page_url):
+        links = []
+        try:
+            path = download(page_url, output_dir, store=store,
+                            on_links=links.extend, **options)
+        except Exception as e:
+            logger.error("Не удалось скачать страницу %s: %s", page_url, e)
+            return None, []
+        return path, links
+
+    with ThreadPoolExecutor(max_workers=page_workers) as executor:
+        while True:
+            current_depth, level = frontier.pop_level()
+            if not level:
+                break
+            logger.info("Глубина %s: страниц %s", current_depth, len(level))
+            for page_url, (path, links) in zip(
+                    level, executor.map(download_page, level)):
+                pages[page_url] = path
+                if current_depth == depth:
+                    continue
+                for link in links:
+                    link = urldefrag(link).url
+                    if is_page_link(link, url):
+                        frontier.add(link, current_depth + 1)
+
+    storage = options.get('storage') or LOCAL_STORAGE
+    rewrite_page_links(pages, storage)
+    storage.flush()
+    return pages
+
+
+def rewrite_page_links(pages, storage=LOCAL_STORAGE):
+    """Заменяет в сохранённых страницах ссылки на скачанные страницы.
+
+    Страницы читаются и записываются через storage (page_loader.storage),
+    то же хранилище, что получил download().
+    """
+    local = {page_url: os.path.basename(path)
+             for page_url, path in pages.items() if path is not None}
+    for page_url, path in pages.items():
+        if path is None:
+            continue
+        document = SpanDocument(storage.read(path).decode('utf-8'))
+
+        changed = False
+        for ref, _, attr, link in document.anchors():
+            if not link:
+                continue
+            target, fragment = urldefrag(urljoin(page_url, link))
+            if target in local:
+                new_link = local[target] + (f"#{fragment}" if fragment else "")
+                document.set_link(ref, attr, new_link)
+                changed = True
+
+        if changed:
+            storage.write(path, document.render())
@@ -1,125 +1,997 @@
+import hashlib
 import logging
 import os
 import re
-import sys
-from urllib.parse import urlparse, urljoin
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urldefrag, urlparse, urljoin
 
 import requests
-from bs4 import BeautifulSoup
 
-# Настройка логирования для читаемого вывода
-logging.basicConfig(level=logging.INFO,
-                    format="%(levelname)s: %(message)s",
-                    stream=sys.stderr)
+from page_loader.archive import PageArchive
+from page_loader.css import is_stylesheet, split_css
+from page_loader.deadline import Deadline, DeadlineExceeded
+from page_loader.defaults import (DEFAULT_TIMEOUT, OUTPUT_FORMATS,
+                                  OVERSIZE_POLICIES)
+from page_loader.filters import ResourceFilteredError
+from page_loader.document import PARSERS, REWRITE_MODES, make_document
+from page_loader.journal import Journal, content_range_start, \
+    content_range_total, journal_path_for
+from page_loader.manifest import Manifest, manifest_path_for
+from page_loader.metrics import NULL_METRICS
+from page_loader.retry import fetch_with_retry
+from page_loader.session import get_session
+from page_loader.storage import LOCAL_STORAGE, LocalStorage
+
+# Логирование настраивает приложение (см. cli.main), библиотека только пишет
 logger = logging.getLogger(__name__)
 
+# Схемы ссылок, которые можно скачать
+FETCH_SCHEMES = ('http', 'https')
+# Размер части при потоковой записи ресурсов
+CHUNK_SIZE = 64 * 1024
+# Предел длины имени файла в байтах: с запасом под суффиксы _files,
+# .manifest.json и .part до ограничения ФС в 255 байт
+MAX_FILENAME_BYTES = 200
+HASH_LENGTH = 10
+# Путь и строка запроса, которые однозначно восстанавливаются по имени
+# файла: слова через "/" и пары "ключ=значение" через "&". Косую черту
+# в конце не отличить от её отсутствия, но это обычно один и тот же адрес
+_EXACT_PATH = re.compile(r'(/\w+)*/?')
+_EXACT_QUERY = re.compile(r'(\w+=\w+(&\w+=\w+)*)?')
+
+
+def make_filename(url, extension=None, unique=False):
+    """Генерирует безопасное имя файла на основе URL и расширения.
 
-def make_filename(url, extension=None):
-    """Генерирует безопасное имя файла на основе URL и расширения"""
+    Строка запроса входит в имя, а слишком длинное имя обрезается до
+    MAX_FILENAME_BYTES байт с хешем URL в конце. С unique=True хеш
+    добавляется и тогда, когда при очистке URL потерялась информация
+    (например, "/a-b.png" и "/a/b.png"), чтобы имя зависело только
+    от своего URL.
+    """
     parsed = urlparse(url)
     path = parsed.netloc + parsed.path
     # Отделяем расширение заранее
     root, ext_from_path = os.path.splitext(path)
     clean_name = re.sub(r'\W+', '-', root).strip('-')
+    if parsed.query:
+        query = re.sub(r'\W+', '-', parsed.query).strip('-')
+        clean_name = f"{clean_name}-{query}"
 
     # Определяем расширение
     if extension:
         ext = extension
     else:
-        ext = ext_from_path.lstrip('.') or 'html'
+        ext = re.sub(r'\W+', '', ext_from_path)[:16] or 'html'
 
     filename = f"{clean_name}.{ext}"
-    logger.debug(f"Сформировано имя файла '{filename}' из URL '{url}'")
-    return f"{clean_name}.{ext}"
+    if len(filename.encode('utf-8')) > MAX_FILENAME_BYTES or \
+            unique and not _is_exact(parsed, ext):
+        filename = _hashed_filename(clean_name, ext, url)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Сформировано имя файла '%s' из URL '%s'", filename, url)
+    return filename
+
+
+def _hashed_filename(clean_name, ext, url):
+    """Имя с хешем URL, обрезанное до MAX_FILENAME_BYTES байт"""
+    digest = hashlib.sha256(url.encode('utf-8')).hexdigest()[:HASH_LENGTH]
+    limit = (MAX_FILENAME_BYTES - len(ext.encode('utf-8'))
+             - HASH_LENGTH - 2)
+    # Обрезаем по байтам, не разрывая многобайтовые символы
+    stem = clean_name.encode('utf-8')[:limit].decode('utf-8', 'ignore')
+    return f"{stem.rstrip('-')}-{digest}.{ext}"
+
+
+def _is_exact(parsed, ext):
+    """True, если имя файла однозначно соответствует URL"""
+    root, ext_from_path = os.path.splitext(parsed.path)
+    return bool(_EXACT_PATH.fullmatch(root)
+                and _EXACT_QUERY.fullmatch(parsed.query)
+                and ext_from_path in ('', f'.{ext}'))
+
+
+class FileNamer:
+    """Имена файлов для URL в пределах одного запуска.
 
+    Имя зависит только от URL (make_filename() с unique=True), поэтому
+    не меняется от порядка ресурсов на странице и страниц в пакете.
+    Если имена всё же совпали (без учёта регистра, как в
+    нечувствительных к нему ФС), второй URL получает имя с хешем, и
+    файлы не перезаписывают друг друга.
+    """
 
-def download_resource(resource_url, save_path):
-    """Скачивает и сохраняет ресурс"""
-    logger.debug(f"Попытка загрузить ресурс: {resource_url}")
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._names = {}
+        self._owners = {}
+
+    def name(self, url, extension=None):
+        """Имя файла для url, см. make_filename()"""
+        key = (url, extension)
+        with self._lock:
+            filename = self._names.get(key)
+            if filename is not None:
+                return filename
+            filename = make_filename(url, extension, unique=True)
+            if self._owners.setdefault(filename.lower(), url) != url:
+                stem, ext = filename.rsplit('.', 1)
+                filename = _hashed_filename(stem, ext, url)
+                logger.debug("Имя файла для %s уже занято, выбрано %s",
+                             url, filename)
+                self._owners[filename.lower()] = url
+            self._names[key] = filename
+            return filename
+
+
+class ResourceTooLargeError(ResourceFilteredError):
+    """Ресурс превышает допустимый размер и не был сохранён"""
+
+
+def check_declared_size(headers, max_size, on_oversize, resource_url):
+    """Пропускает ресурс заранее, если Content-Length больше лимита"""
+    if max_size is None or on_oversize != 'skip':
+        return
     try:
-        response = requests.get(resource_url)
-        response.raise_for_status()
+        declared = int(headers['Content-Length'])
+    except (KeyError, ValueError):
+        return
+    if declared > max_size:
+        logger.warning("Ресурс %s пропущен: размер %s байт больше лимита %s",
+                       resource_url, declared, max_size)
+        raise ResourceTooLargeError(
+            f"Размер ресурса {declared} байт больше лимита {max_size}")
+
+
+def download_resource(resource_url, save_path, session=None, max_size=None,
+                      on_oversize='skip', manifest=None, cache=None,
+                      metrics=None, retry=None, rate_limiter=None,
+                      timeout=DEFAULT_TIMEOUT, deadline=None, storage=None,
+                      resource_filter=None, journal=None):
+    """Скачивает ресурс потоково и атомарно сохраняет его.
+
+    Данные пишутся частями через storage (page_loader.storage, по
+    умолчанию локальная файловая система): в локальной ФС - во временный
+    файл рядом с save_path, который после успешной загрузки
+    переименовывается в итоговый.
+    max_size ограничивает размер ресурса в байтах. При превышении ресурс
+    пропускается с ResourceTooLargeError (on_oversize='skip') или
+    обрезается до max_size (on_oversize='truncate').
+    Если session не передана, используется общая сессия процесса.
+    С manifest (page_loader.manifest.Manifest) отправляется условный
+    запрос, и при ответе 304 сохранённый файл остаётся как есть.
+    С cache (page_loader.cache.ResourceCache) ресурс сначала ищется в
+    локальном кеше, а скачанный ресурс добавляется в него.
+    metrics (page_loader.metrics.Metrics) получает длительности этапов
+    и итоговый статус ресурса.
+    retry (page_loader.retry.RetryPolicy) задаёт повторы запроса при
+    сетевых ошибках и ответах 429/5xx, rate_limiter
+    (page_loader.ratelimit.HostRateLimiter) - частоту запросов к хосту.
+    timeout - таймаут запроса в секундах, число или пара (соединение,
+    чтение). deadline (page_loader.deadline.Deadline) - общий срок
+    загрузки страницы: запрос ограничивается оставшимся временем, а
+    запись прерывается с DeadlineExceeded, когда срок истекает.
+    resource_filter (page_loader.filters.ResourceFilter) отбрасывает
+    ресурс неподходящего типа с ResourceFilteredError до чтения тела,
+    а с resource_filter.head - ещё до GET, по ответу на HEAD.
+    С journal (page_loader.journal.Journal) ресурс, уже сохранённый
+    целиком, не скачивается, недописанный файл при ошибке остаётся,
+    а в следующий раз докачивается запросом Range.
+    Возвращает размер файла ресурса в байтах.
+    """
+    if on_oversize not in OVERSIZE_POLICIES:
+        raise ValueError(f"Неизвестная политика on_oversize: {on_oversize}")
+
+    metrics = metrics or NULL_METRICS
+    started = time.perf_counter()
+    try:
+        size, status, retries = _download_resource(
+            resource_url, save_path, session, max_size, on_oversize,
+            manifest, cache, metrics, retry, rate_limiter, timeout, deadline,
+            storage or LOCAL_STORAGE, resource_filter, journal)
+    except ResourceTooLargeError as e:
+        metrics.resource(resource_url, 'too_large',
+                         time.perf_counter() - started, error=str(e))
+        raise
+    except ResourceFilteredError as e:
+        metrics.resource(resource_url, 'filtered',
+                         time.perf_counter() - started, error=str(e))
+        raise
+    except DeadlineExceeded as e:
+        metrics.resource(resource_url, 'deadline',
+                         time.perf_counter() - started, error=str(e))
+        raise
+    except Exception as e:
+        metrics.resource(resource_url, 'error',
+                         time.perf_counter() - started, error=str(e))
+        raise
+    metrics.resource(resource_url, status, time.perf_counter() - started,
+                     size, retries, path=str(save_path))
+    return size
+
+
+def _download_resource(resource_url, save_path, session, max_size,
+                       on_oversize, manifest, cache, metrics, retry,
+                       rate_limiter, timeout, deadline, storage,
+                       resource_filter, journal):
+    """Загрузка ресурса для download_resource().
+
+    Возвращает (размер, статус, число повторов запроса).
+    """
+    if journal is not None and journal.completed(resource_url, save_path):
+        logger.info("Ресурс уже скачан: %s", save_path)
+        return os.path.getsize(save_path), 'journal_hit', 0
+    if cache is not None and _cache_allows(cache, resource_url,
+                                           resource_filter):
+        cached_size = cache.object_size(resource_url)
+        if max_size is not None and cached_size is not None and \
+                cached_size > max_size:
+            # Лимит действует и на кеш: при 'skip' ресурс пропускается,
+            # при 'truncate' скачивается и обрезается как обычно
+            check_declared_size({'Content-Length': str(cached_size)},
+                                max_size, on_oversize, resource_url)
+        elif cache.get(resource_url, save_path):
+            logger.info("Ресурс взят из кеша: %s", save_path)
+            return os.path.getsize(save_path), 'cache_hit', 0
+
+    session = session or get_session()
+    if resource_filter is not None and resource_filter.head:
+        with metrics.stage('resource_head'):
+            _prefetch_head(session, resource_url, resource_filter, max_size,
+                           on_oversize, retry, rate_limiter, timeout,
+                           deadline)
+    headers = {}
+    offset = 0
+    if journal is not None:
+        offset = storage.partial_size(save_path)
+        if max_size is None or offset < max_size:
+            headers = journal.range_headers(resource_url, offset)
+    if headers:
+        logger.info("Докачка ресурса %s с %s байт", resource_url, offset)
+    elif manifest is not None:
+        headers = manifest.conditional_headers(resource_url, save_path)
+    logger.debug("Попытка загрузить ресурс: %s", resource_url)
+    try:
+        with metrics.stage('resource_request'):
+            response, retries = fetch_with_retry(
+                session, resource_url, retry, rate_limiter,
+                deadline=deadline, stream=True, headers=headers,
+                timeout=timeout)
+        # 416 на докачку: .part уже дописан целиком, но процесс упал до
+        # переименования, либо ресурс на сервере стал короче
+        complete = 'Range' in headers and response.status_code == 416 \
+            and content_range_total(response.headers) == offset
+        if 'Range' in headers and response.status_code == 416 \
+                and not complete:
+            response.close()
+            logger.warning("Недописанный ресурс %s не докачать, "
+                           "скачиваем заново", resource_url)
+            storage.discard_partial(save_path)
+            journal.discard(resource_url)
+            size, status, more = _download_resource(
+                resource_url, save_path, session, max_size, on_oversize,
+                manifest, cache, metrics, retry, rate_limiter, timeout,
+                deadline, storage, resource_filter, journal)
+            return size, status, retries + 1 + more
+        if not complete:
+            response.raise_for_status()
     except requests.RequestException as e:
-        logger.error(f"Ошибка сети при загрузке ресурса {resource_url}: {e}")
+        logger.error("Ошибка сети при загрузке ресурса %s: %s",
+                     resource_url, e)
         raise
 
+    with response:
+        if headers and response.status_code == 304:
+            logger.info("Ресурс не изменился: %s", save_path)
+            return manifest.get(resource_url)['size'], 'not_modified', retries
+
+        if complete:
+            logger.info("Ресурс %s уже дописан, осталось сохранить",
+                        resource_url)
+        elif response.status_code != 206:
+            # Сервер не поддерживает Range или ресурс изменился
+            # (If-Range), тогда ресурс приходит целиком
+            offset = 0
+        elif offset and content_range_start(response.headers) != offset:
+            journal.discard(resource_url)
+            raise requests.RequestException(
+                f"Неожиданный Content-Range ресурса {resource_url}")
+
+        hasher = None
+        if manifest is not None or cache is not None:
+            hasher = hashlib.sha256()
+        if journal is not None:
+            target = storage.open(save_path, offset, keep_partial=True)
+        else:
+            target = storage.open(save_path)
+        try:
+            if resource_filter is not None and not complete:
+                resource_filter.check_response(response.headers,
+                                               resource_url)
+            if not offset:
+                check_declared_size(response.headers, max_size, on_oversize,
+                                    resource_url)
+                if journal is not None:
+                    journal.start(resource_url, response.headers)
+            storage.makedirs(os.path.dirname(save_path), exist_ok=True)
+            with metrics.stage('resource_body'), target as f:
+                if offset and hasher is not None:
+                    # Хеш считается по всему файлу, включая докачанное
+                    f.seek(0)
+                    for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                        hasher.update(chunk)
+                if complete:
+                    written, truncated = offset, False
+                else:
+                    written, truncated = _write_chunks(
+                        response, f, resource_url, max_size, on_oversize,
+                        hasher, deadline, offset)
+        except ResourceFilteredError:
+            # Отброшенный ресурс докачивать незачем
+            if journal is not None:
+                storage.discard_partial(save_path)
+                journal.discard(resource_url)
+            raise
+        except requests.RequestException:
+            # Срок или обрыв соединения при чтении тела - не ошибка записи
+            raise
+        except OSError as e:
+            logger.error("Ошибка при сохранении ресурса %s: %s", save_path, e)
+            raise
+    if journal is not None:
+        journal.finish(resource_url, written)
+    if manifest is not None:
+        manifest.record(resource_url, save_path, response.headers, written,
+                        hasher.hexdigest())
+    # Обрезанный ресурс не кладём в кеш, иначе он отдавался бы и при
+    # запусках без лимита размера
+    if cache is not None and not truncated:
+        try:
+            cache.put(resource_url, save_path, hasher.hexdigest(),
+                      response.headers.get('Content-Type'))
+        except OSError as e:
+            logger.warning("Не удалось добавить %s в кеш: %s", save_path, e)
+    logger.info("Ресурс успешно сохранён: %s", save_path)
+    return written, 'truncated' if truncated else 'ok', retries
+
+
+def _cache_allows(cache, resource_url, resource_filter):
+    """Можно ли брать ресурс из кеша при фильтре по Content-Type.
+
+    Неподходящий тип отбрасывает ресурс сразу, а если тип в кеше
+    неизвестен, ресурс скачивается заново и проверяется по ответу.
+    """
+    if resource_filter is None or resource_filter.mime_types is None:
+        return True
+    content_type = cache.content_type(resource_url)
+    if content_type is None:
+        return False
+    resource_filter.check_response({'Content-Type': content_type},
+                                   resource_url)
+    return True
+
+
+def _prefetch_head(session, resource_url, resource_filter, max_size,
+                   on_oversize, retry, rate_limiter, timeout, deadline):
+    """Проверяет тип и размер ресурса запросом HEAD, не скачивая тело.
+
+    Если HEAD не поддерживается или не удался, решение принимается
+    позже по ответу на GET.
+    """
     try:
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
-        with open(save_path, 'wb') as f:
-            f.write(response.content)
-    except OSError as e:
-        logger.error(f"Ошибка при сохранении ресурса {save_path}: {e}")
+        response, _ = fetch_with_retry(session, resource_url, retry,
+                                       rate_limiter, deadline=deadline,
+                                       method='HEAD', timeout=timeout)
+    except DeadlineExceeded:
         raise
-    logger.info(f"Ресурс успешно сохранён: {save_path}")
+    except requests.RequestException as e:
+        logger.debug("HEAD-запрос %s не удался: %s", resource_url, e)
+        return
+    response.close()
+    if not response.ok:
+        return
+    resource_filter.check_response(response.headers, resource_url)
+    check_declared_size(response.headers, max_size, on_oversize,
+                        resource_url)
+
+
+def clip_chunk(chunk, written, max_size, on_oversize, resource_url):
+    """Применяет лимит размера к очередной части ресурса.
+
+    Возвращает (часть для записи, признак обрезки); при политике 'skip'
+    и превышении лимита выбрасывает ResourceTooLargeError.
+    """
+    if max_size is None or written + len(chunk) <= max_size:
+        return chunk, False
+    if on_oversize == 'skip':
+        logger.warning("Ресурс %s пропущен: больше лимита %s байт",
+                       resource_url, max_size)
+        raise ResourceTooLargeError(
+            f"Размер ресурса больше лимита {max_size}")
+    logger.warning("Ресурс %s обрезан до %s байт", resource_url, max_size)
+    return chunk[:max_size - written], True
+
+
+def _write_chunks(response, f, resource_url, max_size, on_oversize,
+                  hasher=None, deadline=None, offset=0):
+    """Пишет тело ответа в файл f частями с учётом лимита размера.
+
+    offset - сколько байт ресурса уже есть в файле при докачке.
+    Возвращает (размер файла в байтах, признак обрезки).
+    """
+    written = offset
+    truncated = False
+    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+        # Таймаут чтения ограничивает паузу между частями, но не всё
+        # тело, поэтому срок проверяем на каждой части
+        if deadline is not None:
+            deadline.check(resource_url)
+        chunk, truncated = clip_chunk(chunk, written, max_size,
+                                      on_oversize, resource_url)
+        f.write(chunk)
+        if hasher is not None:
+            hasher.update(chunk)
+        written += len(chunk)
+        if truncated:
+            break
+    return written, truncated
 
 
 def is_local_resource(resource_url, base_url):
     """Проверяет, что ресурс принадлежит тому же хосту"""
     is_local = urlparse(resource_url).netloc in ('', urlparse(base_url).netloc)
-    logger.debug(f"Ресурс '{resource_url}' локальный: {is_local}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Ресурс '%s' локальный: %s", resource_url, is_local)
     return is_local
 
 
-def download(url, output_dir=os.getcwd()):
-    """Главная функция: скачивает HTML-страницу и связанные ресурсы."""
-    logger.info(f"Начало загрузки страницы: {url}")
+def collect_resources(document, url, resource_filter=None, namer=None):
+    """Собирает локальные ресурсы страницы: URL -> имя файла и список тегов.
+
+    resource_filter (page_loader.filters.ResourceFilter) отбрасывает
+    ссылки по тегу, rel и расширению. namer (FileNamer) выдаёт имена
+    файлов; по умолчанию свой на каждый вызов.
+    """
+    namer = namer or FileNamer()
+    resources = {}
+    links = document.links()
+    # Уровень логирования и хост страницы определяем один раз на страницу,
+    # а не на каждый тег
+    debug = logger.isEnabledFor(logging.DEBUG)
+    local_netlocs = ('', urlparse(url).netloc)
+    if debug:
+        logger.debug("Найдено %s тегов с потенциальными ресурсами",
+                     len(links))
+    for ref, tag_name, attr, link in links:
+        if not link or link.startswith('#'):
+            if debug:
+                logger.debug("Пропущен тег <%s> без атрибута %s",
+                             tag_name, attr)
+            continue
+
+        full_url = urljoin(url, link)
+        parsed = urlparse(full_url)
+        if parsed.scheme not in FETCH_SCHEMES:
+            continue
+        if parsed.netloc not in local_netlocs:
+            if debug:
+                logger.debug("Пропущен внешний ресурс: %s", full_url)
+            continue
+        if resource_filter is not None and not resource_filter.accepts_link(
+                tag_name, document.get_attr(ref, 'rel'), full_url):
+            if debug:
+                logger.debug("Ресурс отфильтрован: %s", full_url)
+            continue
+
+        if full_url not in resources:
+            resources[full_url] = (namer.name(full_url), [])
+        resources[full_url][1].append((ref, attr))
+    return resources
+
+
+def fetch_resource(full_url, resource_path, **options):
+    """Скачивает один ресурс, возвращает True при успехе.
+
+    options передаются в download_resource().
+    """
     try:
-        response = requests.get(url)
-        response.raise_for_status()
+        logger.info("Загрузка ресурса: %s", full_url)
+        download_resource(full_url, resource_path, **options)
+        return True
+    except ResourceFilteredError as e:
+        logger.info("Ресурс пропущен: %s", e)
+        return False
     except requests.RequestException as e:
-        logger.error(f"Ошибка при запросе страницы {url}: {e}")
-        raise
+        logger.warning("Не удалось скачать ресурс %s: %s", full_url, e)
+        return False
+
 
+def fetch_resources(resources, resource_dir, max_workers=1,
+                    fetch=fetch_resource, **options):
+    """Скачивает ресурсы последовательно или пулом из max_workers потоков.
+
+    fetch - функция загрузки одного ресурса с сигнатурой fetch_resource().
+    Если в options передан deadline и срок истёк, оставшиеся ресурсы
+    не запрашиваются.
+    Возвращает множество URL, которые удалось скачать.
+    """
+    jobs = [(full_url, os.path.join(resource_dir, filename))
+            for full_url, (filename, _) in resources.items()]
+    deadline = options.get('deadline')
+
+    def run(job):
+        if deadline is not None and deadline.remaining() <= 0:
+            return None
+        return fetch(*job, **options)
+
+    if max_workers <= 1 or len(jobs) <= 1:
+        results = [run(job) for job in jobs]
+    else:
+        logger.debug("Параллельная загрузка %s ресурсов, потоков: %s",
+                     len(jobs), max_workers)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(run, jobs))
+
+    cancelled = results.count(None)
+    if cancelled:
+        logger.warning("Истёк срок загрузки, отменено ресурсов: %s",
+                       cancelled)
+    return {job[0] for job, ok in zip(jobs, results) if ok}
+
+
+def fetch_stylesheets(resources, downloaded, resource_dir, page_url,
+                      max_workers=1, fetch=fetch_resource, claim=None,
+                      namer=None, **options):
+    """Скачивает ресурсы из скачанных CSS-файлов и переписывает ссылки.
+
+    Каждый CSS-файл разбирается один раз: url() и @import того же хоста,
+    что и страница, добавляются в resources и скачиваются; вложенные
+    @import обрабатываются следующими волнами. Затем ссылки в файле
+    заменяются на имена скачанных файлов из той же директории.
+    claim(url) - проверка, что файл ещё не обработан другой страницей
+    (см. page_loader.batch.ResourceStore), namer - FileNamer страницы.
+    Возвращает множество всех скачанных URL.
+    """
+    namer = namer or FileNamer()
+    storage = options.get('storage') or LOCAL_STORAGE
+    downloaded = set(downloaded)
+    sheets = []
+    pending = stylesheet_urls(resources, downloaded)
+    while pending:
+        found = scan_stylesheets(pending, resources, resource_dir, page_url,
+                                 sheets, namer, storage,
+                                 options.get('resource_filter'), claim)
+        if not found:
+            break
+        resources.update(found)
+        fetched = fetch_resources(found, resource_dir, max_workers, fetch,
+                                  **options)
+        downloaded |= fetched
+        pending = stylesheet_urls(found, fetched)
+    rewrite_stylesheets(sheets, resources, downloaded, storage,
+                        options.get('manifest'), options.get('journal'))
+    return downloaded
+
+
+def stylesheet_urls(resources, downloaded):
+    """URL скачанных CSS-файлов среди resources"""
+    return [full_url for full_url, (filename, _) in resources.items()
+            if full_url in downloaded and is_stylesheet(filename)]
+
+
+def scan_stylesheets(pending, resources, resource_dir, page_url, sheets,
+                     namer, storage=LOCAL_STORAGE, resource_filter=None,
+                     claim=None):
+    """Одна волна fetch_stylesheets(): разбирает CSS-файлы pending.
+
+    Разобранные файлы добавляются в sheets для rewrite_stylesheets().
+    Возвращает новые ресурсы в формате collect_resources().
+    """
+    netloc = urlparse(page_url).netloc
+    found = {}
+    for css_url in pending:
+        if claim is not None and not claim(css_url):
+            continue
+        path = os.path.join(resource_dir, resources[css_url][0])
+        try:
+            # surrogateescape сохраняет байты не в UTF-8 как есть
+            parts = split_css(storage.read(path).decode(
+                'utf-8', 'surrogateescape'))
+        except OSError as e:
+            logger.warning("Не удалось прочитать %s: %s", path, e)
+            continue
+        refs = []
+        for index in range(1, len(parts), 2):
+            if parts[index].startswith('#'):
+                continue
+            full_url, fragment = urldefrag(urljoin(css_url, parts[index]))
+            parsed = urlparse(full_url)
+            if parsed.scheme not in FETCH_SCHEMES or \
+                    parsed.netloc != netloc:
+                continue
+            if resource_filter is not None and \
+                    not resource_filter.accepts_link(None, None, full_url):
+                continue
+            refs.append((index, full_url, fragment))
+            if full_url not in resources and full_url not in found:
+                found[full_url] = (namer.name(full_url), [])
+        sheets.append((css_url, path, parts, refs))
+    if found:
+        logger.debug("В CSS найдено новых ресурсов: %s", len(found))
+    return found
+
+
+def rewrite_stylesheets(sheets, resources, downloaded, storage=LOCAL_STORAGE,
+                        manifest=None, journal=None):
+    """Заменяет в разобранных CSS-файлах ссылки на скачанные ресурсы"""
+    for css_url, path, parts, refs in sheets:
+        changed = False
+        for index, full_url, fragment in refs:
+            if full_url in downloaded:
+                parts[index] = resources[full_url][0] + (
+                    f"#{fragment}" if fragment else '')
+                changed = True
+        if not changed:
+            continue
+        try:
+            storage.write(path, ''.join(parts).encode('utf-8',
+                                                      'surrogateescape'))
+        except OSError as e:
+            logger.warning("Не удалось переписать %s: %s", path, e)
+            continue
+        # Переписанный файл не совпадает с ответом сервера, поэтому
+        # условный запрос для него больше не годится
+        if manifest is not None:
+            manifest.discard(css_url)
+        if journal is not None:
+            journal.discard(css_url)
+
+
+def prepare_page(html, url, output_dir, resource_dir=None, exist_ok=False,
+                 parser='html.parser', rewrite='prettify',
+                 storage=LOCAL_STORAGE, resource_filter=None, namer=None,
+                 parse_pool=None):
+    """Разбирает HTML и готовит директорию для ресурсов страницы.
+
+    По умолчанию ресурсы кладутся в новую директорию <имя>_files, которой
+    ещё не должно быть (если не передан exist_ok); переданная
+    resource_dir может уже существовать.
+    parser и rewrite выбирают способ разбора и сохранения HTML,
+    см. page_loader.document.make_document().
+    Возвращает (document, base_name, resource_dir, resources), где
+    resources - результат collect_resources() с resource_filter.
+    namer (FileNamer) выдаёт имена HTML и ресурсов. С parse_pool
+    (page_loader.parallel.ParsePool) HTML разбирается в процессе пула.
+    """
     # Проверяем, что директория существует
-    if not os.path.exists(output_dir):
+    if not storage.exists(output_dir):
         raise Exception(f"Ошибка: директория {output_dir} не существует")
 
-    soup = BeautifulSoup(response.text, 'html.parser')
-    base_name = make_filename(url, 'html').replace('.html', '')
-    resource_dir = os.path.join(output_dir, f"{base_name}_files")
+    namer = namer or FileNamer()
+    base_name = os.path.splitext(namer.name(url, 'html'))[0]
+    shared = resource_dir is not None
+    if not shared:
+        resource_dir = os.path.join(output_dir, f"{base_name}_files")
 
     # Создаём папку для ресурсов
     try:
-        os.makedirs(resource_dir)
-        logger.debug(f"Создана директория для ресурсов: {resource_dir}")
+        storage.makedirs(resource_dir, exist_ok=shared or exist_ok)
+        logger.debug("Создана директория для ресурсов: %s", resource_dir)
     except OSError as e:
         raise Exception(
             f"Ошибка при создании директории {resource_dir}: {e}") from e
 
-    tags = soup.find_all(['img', 'link', 'script'])
-    logger.debug(f"Найдено {len(tags)} тегов с потенциальными ресурсами")
-    for tag in tags:
-        attr = 'src' if tag.name in ['img', 'script'] else 'href'
-        link = tag.get(attr)
-        if not link:
-            logger.debug(f"Пропущен тег <{tag.name}> без атрибута {attr}")
-            continue
+    if parse_pool is not None:
+        document = parse_pool.parse(html, parser, rewrite)
+    else:
+        document = make_document(html, parser, rewrite)
 
-        full_url = urljoin(url, link)
-        if not is_local_resource(full_url, url):
-            logger.debug(f"Пропущен внешний ресурс: {full_url}")
-            continue
+    return document, base_name, resource_dir, collect_resources(
+        document, url, resource_filter, namer)
 
-        resource_filename = make_filename(full_url)
-        resource_path = os.path.join(resource_dir, resource_filename)
 
-        try:
-            logger.info(f"Загрузка ресурса: {full_url}")
-            download_resource(full_url, resource_path)
-            tag[attr] = f"{base_name}_files/{resource_filename}"
-        except requests.RequestException as e:
-            logger.warning(f"Не удалось скачать ресурс {full_url}: {e}")
+def finish_page(document, resources, downloaded, base_name, output_dir,
+                resource_dir, metrics=NULL_METRICS, archive=None,
+                storage=LOCAL_STORAGE):
+    """Заменяет ссылки на скачанные ресурсы и сохраняет HTML.
+
+    С archive (page_loader.archive.PageArchive) HTML записывается в архив,
+    который затем закрывается; возвращается путь к архиву.
+    """
+    if archive is not None:
+        link_prefix = archive.prefix
+    else:
+        link_prefix = os.path.relpath(resource_dir, output_dir).replace(
+            os.sep, '/')
+    # Заменяем ссылки только после загрузки, чтобы порядок завершения
+    # потоков не влиял на итоговый HTML
+    for full_url in downloaded:
+        resource_filename, tags = resources[full_url]
+        for ref, attr in tags:
+            document.set_link(ref, attr, f"{link_prefix}/{resource_filename}")
 
     # Сохраняем изменённый HTML
     html_path = os.path.join(output_dir, f"{base_name}.html")
 
+    with metrics.stage('serialize'):
+        html = document.render()
+    if archive is not None:
+        try:
+            with metrics.stage('write_html'):
+                archive.write_page(f"{base_name}.html", html)
+                archive.close()
+        except OSError as e:
+            raise Exception(
+                f"Ошибка при сохранении архива {archive.path}: {e}") from e
+        logger.info("Архив страницы сохранён: %s", archive.path)
+        return archive.path
     try:
-        with open(html_path, 'w', encoding='utf-8') as f:
-            f.write(soup.prettify())
-        logger.info(f"HTML успешно сохранён: {html_path}")
+        with metrics.stage('write_html'):
+            storage.write(html_path, html)
+        logger.info("HTML успешно сохранён: %s", html_path)
     except OSError as e:
         raise Exception(
             f"Ошибка при сохранении HTML-файла {html_path}: {e}") from e
+    return html_path
+
+
+def download(url, output_dir=os.getcwd(), max_workers=1, session=None,
+             max_size=None, on_oversize='skip', store=None,
+             incremental=False, cache=None, parser='html.parser',
+             rewrite='prettify', on_links=None, metrics=None, retry=None,
+             rate_limiter=None, timeout=DEFAULT_TIMEOUT, deadline=None,
+             output_format='files', storage=None, resource_filter=None,
+             parse_pool=None, resume=False):
+    """Главная функция: скачивает HTML-страницу и связанные ресурсы.
+
+    max_workers задаёт число потоков для параллельной загрузки ресурсов,
+    при значении 1 ресурсы скачиваются последовательно.
+    session - сессия requests для страницы и всех ресурсов; по умолчанию
+    используется общая сессия процесса, см. page_loader.session.
+    max_size и on_oversize ограничивают размер каждого ресурса,
+    см. download_resource().
+    store - общее хранилище ресурсов (page_loader.batch.ResourceStore):
+    ресурсы берутся из него и ссылки ведут в его директорию вместо
+    отдельной <имя>_files.
+    incremental включает инкрементальный режим: директория ресурсов
+    обновляется на месте, а рядом с ней хранится манифест
+    (<директория>.manifest.json) с ETag, Last-Modified, размером и хешем
+    ресурсов, по которому неизменившиеся ресурсы не скачиваются заново.
+    cache - локальный кеш ресурсов (page_loader.cache.ResourceCache),
+    общий для запусков и директорий.
+    parser - парсер BeautifulSoup ('html.parser', 'lxml' или 'auto');
+    rewrite='minimal' вместо prettify() меняет в исходном HTML только
+    значения переписанных атрибутов, что быстрее на больших страницах.
+    on_links - функция, которая получает абсолютные URL из <a href>
+    страницы (используется при зеркалировании сайта).
+    metrics - page_loader.metrics.Metrics для замера этапов загрузки;
+    без него инструментирование отключено.
+    retry, rate_limiter и timeout применяются к запросам страницы и
+    ресурсов, см. download_resource().
+    deadline - срок в секундах на всю страницу с ресурсами. Когда он
+    истекает, незавершённые ресурсы отменяются, их ссылки остаются
+    исходными, и сохраняется HTML с тем, что успело скачаться.
+    output_format='zip' сохраняет страницу с ресурсами в один архив
+    <имя>.zip (см. page_loader.archive.PageArchive) и возвращает путь
+    к нему; несовместим с store, incremental и resume.
+    storage - куда сохранять страницу и ресурсы (page_loader.storage:
+    LocalStorage, MemoryStorage, ObjectStorage, CompressedStorage); по
+    умолчанию локальная файловая система. Кеш, инкрементальный режим и
+    архив работают только с локальной файловой системой. Возвращается
+    путь страницы в storage, по которому её читает storage.read(): для
+    CompressedStorage это <имя>.html, а файл на диске -
+    storage.location(путь), то есть <имя>.html.gz.
+    resource_filter (page_loader.filters.ResourceFilter) ограничивает
+    скачиваемые ресурсы по тегу, rel, расширению и типу; с max_size и
+    resource_filter.head лишние ресурсы отсеиваются запросом HEAD.
+    parse_pool (page_loader.parallel.ParsePool) переносит разбор и
+    сериализацию HTML в процессы пула, чтобы при пакетной загрузке
+    страницы разбирались на нескольких ядрах.
+    resume продолжает прерванную загрузку: уже существующая директория
+    ресурсов используется как есть, а журнал (<директория>.journal,
+    page_loader.journal.Journal) отмечает сохранённые ресурсы, поэтому
+    скачиваются только недостающие, а недописанные докачиваются
+    запросом Range. Когда страница скачана полностью, журнал удаляется.
+    Работает только с локальной файловой системой и без архива.
+    """
+    if max_workers < 1:
+        raise ValueError(
+            f"max_workers должно быть не меньше 1, получено {max_workers}")
+    if on_oversize not in OVERSIZE_POLICIES:
+        raise ValueError(f"Неизвестная политика on_oversize: {on_oversize}")
+    if parser not in PARSERS or rewrite not in REWRITE_MODES:
+        raise ValueError(f"Неизвестный парсер {parser} или режим {rewrite}")
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Неизвестный формат вывода: {output_format}")
+    if output_format != 'files' and (store is not None or incremental
+                                     or resume):
+        raise ValueError("Архив несовместим с store, incremental и resume")
+    storage = storage or LOCAL_STORAGE
+    if not isinstance(storage, LocalStorage) and (
+            incremental or resume or cache is not None
+            or output_format != 'files'):
+        raise ValueError(
+            "Кеш, incremental, resume и архив требуют локальной ФС")
 
-    logger.info(f"Загрузка страницы завершена: {url}")
+    metrics = metrics or NULL_METRICS
+    deadline = Deadline.coerce(deadline)
+    started = time.perf_counter()
+    try:
+        html_path = _download_page(
+            url, output_dir, max_workers, session or get_session(), store,
+            incremental, resume, parser, rewrite, on_links, metrics,
+            output_format, parse_pool, max_size=max_size,
+            on_oversize=on_oversize, cache=cache, retry=retry,
+            rate_limiter=rate_limiter, timeout=timeout, deadline=deadline,
+            storage=storage, resource_filter=resource_filter)
+    except Exception as e:
+        metrics.page(url, time.perf_counter() - started, error=str(e))
+        raise
+    metrics.page(url, time.perf_counter() - started, html_path)
+    return html_path
+
+
+def _download_page(url, output_dir, max_workers, session, store, incremental,
+                   resume, parser, rewrite, on_links, metrics, output_format,
+                   parse_pool, **options):
+    """Загрузка страницы для download(); options уходят в download_resource"""
+    logger.info("Начало загрузки страницы: %s", url)
+    try:
+        with metrics.stage('page_fetch'):
+            response, _ = fetch_with_retry(
+                session, url, options['retry'], options['rate_limiter'],
+                deadline=options['deadline'], timeout=options['timeout'])
+        response.raise_for_status()
+    except requests.RequestException as e:
+        logger.error("Ошибка при запросе страницы %s: %s", url, e)
+        raise
+
+    if output_format == 'zip':
+        # Ресурсы скачиваются во временную директорию и по одному
+        # переносятся в архив, на диске остаётся только он
+        staging = tempfile.mkdtemp(prefix='page-loader-')
+        try:
+            return _download_to_archive(response.text, url, output_dir,
+                                        staging, max_workers, session,
+                                        parser, rewrite, on_links, metrics,
+                                        parse_pool, **options)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    # У общего хранилища общие имена, чтобы ресурсы разных страниц
+    # не перезаписывали друг друга
+    namer = store.namer if store is not None else FileNamer()
+    with metrics.stage('parse'):
+        document, base_name, resource_dir, resources = prepare_page(
+            response.text, url, output_dir,
+            store.directory if store is not None else None,
+            incremental or resume, parser, rewrite, options['storage'],
+            options['resource_filter'], namer, parse_pool)
+    try:
+        downloaded = _fetch_page_resources(
+            document, url, resources, resource_dir, max_workers, session,
+            store, incremental, resume, on_links, metrics, namer, **options)
+    except BaseException:
+        if parse_pool is not None:
+            document.discard()
+        raise
+    html_path = finish_page(document, resources, downloaded, base_name,
+                            output_dir, resource_dir, metrics,
+                            storage=options['storage'])
+    options['storage'].flush()
+
+    logger.info("Загрузка страницы завершена: %s", url)
     return html_path
+
+
+def _fetch_page_resources(document, url, resources, resource_dir,
+                          max_workers, session, store, incremental, resume,
+                          on_links, metrics, namer, **options):
+    """Скачивает ресурсы страницы для _download_page().
+
+    Возвращает множество скачанных URL.
+    """
+    report_links(document, url, on_links)
+    manifest = None
+    if incremental:
+        manifest = (store.manifest if store is not None
+                    else Manifest.load(manifest_path_for(resource_dir)))
+    journal = None
+    if resume:
+        journal = (store.journal if store is not None
+                   else Journal.load(journal_path_for(resource_dir)))
+
+    fetch = store.fetch if store is not None else fetch_resource
+    claim = store.claim_stylesheet if store is not None else None
+    with metrics.stage('resources'):
+        downloaded = fetch_resources(resources, resource_dir, max_workers,
+                                     fetch, session=session,
+                                     manifest=manifest, journal=journal,
+                                     metrics=metrics, **options)
+        downloaded = fetch_stylesheets(resources, downloaded, resource_dir,
+                                       url, max_workers, fetch, claim, namer,
+                                       session=session, manifest=manifest,
+                                       journal=journal, metrics=metrics,
+                                       **options)
+    for index in (manifest, options['cache']):
+        if index is None:
+            continue
+        try:
+            index.save()
+        except OSError as e:
+            logger.warning("Не удалось сохранить индекс: %s", e)
+    # Журнал общего хранилища нужен и другим страницам
+    if journal is not None and store is None and \
+            downloaded >= set(resources):
+        journal.remove()
+    return downloaded
+
+
+def report_links(document, url, on_links):
+    """Передаёт в on_links абсолютные URL из <a href> страницы"""
+    if on_links is not None:
+        on_links([urljoin(url, link)
+                  for _, _, _, link in document.anchors() if link])
+
+
+def _download_to_archive(html, url, output_dir, staging, max_workers,
+                         session, parser, rewrite, on_links, metrics,
+                         parse_pool, **options):
+    """Загрузка страницы в архив для download(output_format='zip')"""
+    namer = FileNamer()
+    with metrics.stage('parse'):
+        document, base_name, resource_dir, resources = prepare_page(
+            html, url, output_dir, staging, parser=parser, rewrite=rewrite,
+            resource_filter=options['resource_filter'], namer=namer,
+            parse_pool=parse_pool)
+    try:
+        report_links(document, url, on_links)
+        archive = PageArchive(os.path.join(output_dir, f"{base_name}.zip"),
+                              f"{base_name}_files")
+    except BaseException:
+        if parse_pool is not None:
+            document.discard()
+        raise
+
+    def fetch(full_url, resource_path, **fetch_options):
+        ok = fetch_resource(full_url, resource_path, **fetch_options)
+        # CSS-файлы попадают в архив после замены ссылок в них
+        if ok and not is_stylesheet(resource_path):
+            archive.add_resource(full_url, resource_path)
+        return ok
+
+    try:
+        with metrics.stage('resources'):
+            downloaded = fetch_resources(resources, resource_dir,
+                                         max_workers, fetch,
+                                         session=session, metrics=metrics,
+                                         **options)
+            downloaded = fetch_stylesheets(resources, downloaded,
+                                           resource_dir, url, max_workers,
+                                           fetch, namer=namer,
+                                           session=session,
+                                           metrics=metrics, **options)
+        for full_url, (filename, _) in resources.items():
+            if full_url in downloaded and is_stylesheet(filename):
+                archive.add_resource(full_url,
+                                     os.path.join(resource_dir, filename))
+        if options['cache'] is not None:
+            try:
+                options['cache'].save()
+            except OSError as e:
+                logger.warning("Не удалось сохранить индекс: %s", e)
+        archive_path = finish_page(document, resources, downloaded,
+                                   base_name, output_dir, resource_dir,
+                                   metrics, archive)
+    except BaseException:
+        archive.abort()
+        if parse_pool is not None:
+            document.discard()
+        raise
+
+    logger.info("Загрузка страницы завершена: %s", url)
+    return archive_path
@@ -0,0 +1,138 @@
+import itertools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from page_loader.document import make_document
+
+# Документы, разобранные в этом процессе пула: id страницы ->
+# (документ, [(ссылка на тег, атрибут), ...])
+_documents = {}
+
+
+def _parse(page_id, html, parser, rewrite):
+    """Разбирает страницу в процессе пула и оставляет документ в нём"""
+    document = make_document(html, parser, rewrite)
+    links = document.links()
+    _documents[page_id] = (document, [(ref, attr)
+                                      for ref, _, attr, _ in links])
+    entries = [(index, tag, attr, value)
+               for index, (_, tag, attr, value) in enumerate(links)]
+    rels = {index: document.get_attr(ref, 'rel')
+            for index, (ref, tag, _, _) in enumerate(links)
+            if tag == 'link'}
+    anchors = [(None, tag, attr, value)
+               for _, tag, attr, value in document.anchors()]
+    return entries, rels, anchors
+
+
+def _render(page_id, replacements):
+    """Заменяет ссылки в разобранном ранее документе и сериализует его"""
+    document, refs = _documents.pop(page_id)
+    for index, value in replacements:
+        ref, attr = refs[index]
+        document.set_link(ref, attr, value)
+    return document.render()
+
+
+def _discard(page_id):
+    _documents.pop(page_id, None)
+
+
+class ParsePool:
+    """Пул процессов для разбора и сериализации HTML.
+
+    Разбор BeautifulSoup упирается в GIL, поэтому в пакетном режиме
+    страницы разбираются в отдельных процессах, пока потоки скачивают
+    ресурсы. Разобранный документ остаётся в своём процессе: каждый
+    процесс - отдельный ProcessPoolExecutor с одним рабочим, и render()
+    уходит туда же, где был parse(). Новая страница достаётся процессу
+    с самой короткой очередью задач.
+    """
+
+    def __init__(self, processes=None):
+        processes = processes or os.cpu_count() or 1
+        if processes < 1:
+            raise ValueError(
+                f"processes должно быть не меньше 1, получено {processes}")
+        # spawn, а не fork: пул может создаваться при работающих потоках
+        context = multiprocessing.get_context('spawn')
+        self._executors = [ProcessPoolExecutor(1, mp_context=context)
+                           for _ in range(processes)]
+        self._queued = [0] * processes
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+
+    def _call(self, worker, func, *args):
+        with self._lock:
+            self._queued[worker] += 1
+        try:
+            return self._executors[worker].submit(func, *args).result()
+        finally:
+            with self._lock:
+                self._queued[worker] -= 1
+
+    def parse(self, html, parser='html.parser', rewrite='prettify'):
+        """Разбирает HTML в процессе пула, см. make_document()"""
+        with self._lock:
+            worker = min(range(len(self._queued)),
+                         key=self._queued.__getitem__)
+            page_id = next(self._ids)
+        entries, rels, anchors = self._call(worker, _parse, page_id, html,
+                                            parser, rewrite)
+        return RemoteDocument(self, worker, page_id, entries, rels, anchors)
+
+    def close(self):
+        for executor in self._executors:
+            executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class RemoteDocument:
+    """Документ, разобранный в процессе ParsePool.
+
+    Интерфейс как у документов page_loader.document: ссылки на теги
+    заменены номерами, а замены копятся и применяются в render().
+    get_attr() знает только rel тегов <link>.
+    """
+
+    def __init__(self, pool, worker, page_id, entries, rels, anchors):
+        self._pool = pool
+        self._worker = worker
+        self._page_id = page_id
+        self._entries = entries
+        self._rels = rels
+        self._anchors = anchors
+        self._replacements = []
+        self._open = True
+
+    def links(self):
+        return list(self._entries)
+
+    def anchors(self):
+        return list(self._anchors)
+
+    def get_attr(self, ref, name):
+        if name != 'rel':
+            raise ValueError(f"Атрибут {name} недоступен")
+        return self._rels.get(ref)
+
+    def set_link(self, ref, attr, value):
+        self._replacements.append((ref, value))
+
+    def render(self):
+        self._open = False
+        return self._pool._call(self._worker, _render, self._page_id,
+                                self._replacements)
+
+    def discard(self):
+        """Освобождает документ в процессе пула, если render() не было"""
+        if self._open:
+            self._open = False
+            self._pool._call(self._worker, _discard, self._page_id)
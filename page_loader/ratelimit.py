@@ -0,0 +1,75 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+from page_loader.deadline import DeadlineExceeded
+
+
+class TokenBucket:
+    """Ведро токенов: rate токенов в секунду, не больше burst про запас"""
+
+    def __init__(self, rate, burst=1):
+        if rate <= 0 or burst < 1:
+            raise ValueError(
+                "rate должна быть больше 0, а burst - не меньше 1")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_delay=None):
+        """Забирает токен и возвращает, сколько секунд нужно подождать.
+
+        Если ждать пришлось бы дольше max_delay, токен не забирается и
+        возвращается None.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens +
+                               (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            # Токен берётся в долг: ждём, пока он накопится
+            delay = (1 - self._tokens) / self.rate
+            if max_delay is not None and delay > max_delay:
+                return None
+            self._tokens -= 1
+            return delay
+
+
+class HostRateLimiter:
+    """Ограничивает частоту запросов к каждому хосту отдельным ведром"""
+
+    def __init__(self, rate, burst=1):
+        if rate <= 0 or burst < 1:
+            raise ValueError(
+                "rate должна быть больше 0, а burst - не меньше 1")
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def _bucket(self, host):
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return self._buckets[host]
+
+    def wait(self, url, deadline=None):
+        """Ждёт, пока к хосту url можно отправить следующий запрос.
+
+        С deadline не ждёт дольше срока: если очередь к хосту до него не
+        подойдёт, сразу выбрасывает DeadlineExceeded.
+        """
+        max_delay = None if deadline is None else deadline.remaining()
+        delay = self._bucket(urlparse(url).netloc).reserve(max_delay)
+        if delay is None:
+            raise DeadlineExceeded(
+                f"Истёк срок {deadline.seconds} с, запрос {url} отменён: "
+                f"очередь к хосту не успевает подойти")
+        if delay > 0:
+            time.sleep(delay)
+        return delay
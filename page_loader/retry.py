@@ -0,0 +1,100 @@
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class RetryPolicy:
+    """Повторы запросов с экспоненциальной задержкой и случайным разбросом.
+
+    attempts - общее число попыток. Задержка перед повтором n равна
+    backoff * 2 ** n, но не больше max_backoff; с jitter берётся случайное
+    значение от нуля до неё. Заголовок Retry-After ответа имеет приоритет.
+    """
+
+    def __init__(self, attempts=3, backoff=0.5, max_backoff=30.0,
+                 jitter=True, statuses=RETRY_STATUSES):
+        if attempts < 1 or backoff < 0 or max_backoff < 0:
+            raise ValueError("attempts должно быть не меньше 1, а задержки "
+                             "не могут быть отрицательными")
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = frozenset(statuses)
+
+    def delay(self, retry, response=None):
+        """Задержка в секундах перед повтором номер retry (с нуля)"""
+        retry_after = _retry_after(response)
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        delay = min(self.max_backoff, self.backoff * 2 ** retry)
+        return random.uniform(0, delay) if self.jitter else delay
+
+
+def _retry_after(response):
+    """Секунды из Retry-After: число или HTTP-дата; None, если нет"""
+    if response is None:
+        return None
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, moment.timestamp() - time.time())
+
+
+def fetch_with_retry(session, url, policy=None, rate_limiter=None,
+                     sleep=time.sleep, deadline=None, method='GET',
+                     **kwargs):
+    """Выполняет HTTP-запрос method с повторами и ограничением частоты.
+
+    Повторяются сетевые ошибки и ответы со статусами policy.statuses;
+    после последней попытки возвращается последний ответ или выбрасывается
+    последняя ошибка. Возвращает (ответ, число повторов).
+    С deadline (page_loader.deadline.Deadline) таймаут каждой попытки
+    не выходит за срок, а после срока выбрасывается DeadlineExceeded.
+    """
+    attempts = policy.attempts if policy is not None else 1
+    timeout = kwargs.pop('timeout', None)
+    for retry in range(attempts):
+        if deadline is not None:
+            deadline.check(url)
+        if rate_limiter is not None:
+            rate_limiter.wait(url, deadline)
+        if deadline is not None:
+            kwargs['timeout'] = deadline.clamp(timeout)
+        elif timeout is not None:
+            kwargs['timeout'] = timeout
+        last_attempt = retry == attempts - 1
+        try:
+            response = session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if last_attempt:
+                raise
+            delay = policy.delay(retry)
+            logger.warning("Ошибка запроса %s: %s, повтор через %.2f с",
+                           url, e, delay)
+        else:
+            if last_attempt or response.status_code not in policy.statuses:
+                return response, retry
+            delay = policy.delay(retry, response)
+            logger.warning("Ответ %s от %s, повтор через %.2f с",
+                           response.status_code, url, delay)
+            response.close()
+        if deadline is not None:
+            # Не ждём дольше срока: следующая попытка сразу его проверит
+            delay = min(delay, deadline.remaining())
+        sleep(delay)
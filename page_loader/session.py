@@ -0,0 +1,54 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+from page_loader.defaults import (DEFAULT_POOL_CONNECTIONS,
+                                  DEFAULT_POOL_MAXSIZE)
+# Сжатия, которые urllib3 умеет распаковывать в этом окружении: gzip и
+# deflate всегда, br - с пакетом brotli, zstd - с zstandard
+DEFAULT_ACCEPT_ENCODING = ', '.join(ACCEPT_ENCODING.split(','))
+
+_shared_session = None
+_shared_lock = threading.Lock()
+
+
+def make_session(pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 accept_encoding=None):
+    """Создаёт сессию requests с пулом keep-alive соединений.
+
+    pool_maxsize ограничивает число соединений к одному хосту, поэтому
+    при параллельной загрузке его стоит делать не меньше max_workers.
+    accept_encoding - сжатия, которые сервер может применить к ответам;
+    тело распаковывается потоково, по мере чтения частями в
+    download_resource(). По умолчанию - DEFAULT_ACCEPT_ENCODING,
+    'identity' отключает сжатие.
+    """
+    session = requests.Session()
+    session.headers['Accept-Encoding'] = (accept_encoding
+                                          or DEFAULT_ACCEPT_ENCODING)
+    adapter = HTTPAdapter(pool_connections=pool_connections,
+                          pool_maxsize=pool_maxsize)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session():
+    """Возвращает общую для процесса сессию, создавая её при первом вызове"""
+    global _shared_session
+    with _shared_lock:
+        if _shared_session is None:
+            _shared_session = make_session()
+        return _shared_session
+
+
+def close_session():
+    """Закрывает общую сессию и освобождает её соединения"""
+    global _shared_session
+    with _shared_lock:
+        if _shared_session is not None:
+            _shared_session.close()
+            _shared_session = None
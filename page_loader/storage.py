@@ -0,0 +1,372 @@
+import contextlib
+import gzip
+import io
+import json
+import os
+import posixpath
+import tempfile
+import threading
+
+from page_loader.archive import TEXT_EXTENSIONS
+
+# Буфер записи в файл, байт
+BUFFER_SIZE = 256 * 1024
+# Объекты больше этого размера объектное хранилище держит не в памяти,
+# а во временном файле до отправки
+SPOOL_SIZE = 8 * 1024 * 1024
+# Индекс сжатых файлов CompressedStorage
+COMPRESSED_INDEX_NAME = "compressed.json"
+GZIP_SUFFIX = ".gz"
+
+
+class LocalStorage:
+    """Хранилище в локальной файловой системе.
+
+    Файлы пишутся с буфером buffer_size во временный <путь>.part и
+    атомарно переименовываются, поэтому недописанных файлов не остаётся.
+    """
+
+    def __init__(self, buffer_size=BUFFER_SIZE):
+        self.buffer_size = buffer_size
+
+    def exists(self, path):
+        return os.path.exists(path)
+
+    def makedirs(self, path, exist_ok=False):
+        os.makedirs(path, exist_ok=exist_ok)
+
+    @contextlib.contextmanager
+    def open(self, path, offset=0, keep_partial=False):
+        """Открывает файл для двоичной записи; сохраняется при выходе.
+
+        offset > 0 продолжает запись в недописанный <путь>.part с этой
+        позиции. keep_partial оставляет .part при ошибке для докачки.
+        """
+        tmp_path = f"{path}.part"
+        try:
+            with open(tmp_path, 'r+b' if offset else 'wb',
+                      buffering=self.buffer_size) as f:
+                if offset:
+                    f.truncate(offset)
+                    f.seek(offset)
+                yield f
+            os.replace(tmp_path, path)
+        except BaseException:
+            if not keep_partial:
+                self.discard_partial(path)
+            raise
+
+    def partial_size(self, path):
+        """Размер недописанного <путь>.part, 0 если его нет"""
+        try:
+            return os.path.getsize(f"{path}.part")
+        except OSError:
+            return 0
+
+    def discard_partial(self, path):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(f"{path}.part")
+
+    def write(self, path, data):
+        """Записывает содержимое целиком; строки - в UTF-8"""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        with self.open(path) as f:
+            f.write(data)
+
+    def read(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def size(self, path):
+        return os.path.getsize(path)
+
+    def flush(self):
+        """Локальные файлы пишутся сразу, отложенных записей нет"""
+
+
+class MemoryStorage:
+    """Хранилище в памяти: путь -> байты.
+
+    Директорий как таковых нет: любая директория считается существующей,
+    а makedirs() только проверяет, что под путём ещё нет файлов.
+    """
+
+    def __init__(self):
+        self.files = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(path):
+        return posixpath.normpath(str(path).replace(os.sep, '/'))
+
+    def exists(self, path):
+        return True
+
+    def makedirs(self, path, exist_ok=False):
+        prefix = self._key(path) + '/'
+        with self._lock:
+            if not exist_ok and any(key.startswith(prefix)
+                                    for key in self.files):
+                raise FileExistsError(f"Директория {path} уже существует")
+
+    @contextlib.contextmanager
+    def open(self, path):
+        buffer = io.BytesIO()
+        yield buffer
+        with self._lock:
+            self.files[self._key(path)] = buffer.getvalue()
+
+    def write(self, path, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        with self._lock:
+            self.files[self._key(path)] = bytes(data)
+
+    def read(self, path):
+        with self._lock:
+            try:
+                return self.files[self._key(path)]
+            except KeyError:
+                raise FileNotFoundError(path) from None
+
+    def size(self, path):
+        return len(self.read(path))
+
+    def flush(self):
+        """Всё уже в памяти"""
+
+
+class ObjectStorage:
+    """Хранилище в S3-совместимом бакете.
+
+    client - клиент с методами put_object, get_object и head_object
+    в стиле boto3 (например, boto3.client('s3') или LocalS3Client).
+    Путь файла становится ключом prefix/<путь>. Объект собирается в
+    буфере и отправляется одним запросом; объекты меньше batch_bytes
+    откладываются и отправляются пачкой, когда их наберётся batch_size,
+    или при flush().
+    """
+
+    def __init__(self, client, bucket, prefix='', batch_size=1,
+                 batch_bytes=64 * 1024):
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.batch_size = batch_size
+        self.batch_bytes = batch_bytes
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def key(self, path):
+        """Ключ объекта для пути файла"""
+        path = posixpath.normpath(str(path).replace(os.sep, '/'))
+        return posixpath.join(self.prefix, path.lstrip('/'))
+
+    def exists(self, path):
+        return True
+
+    def makedirs(self, path, exist_ok=False):
+        """В бакете нет директорий"""
+
+    @contextlib.contextmanager
+    def open(self, path):
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE) as buffer:
+            yield buffer
+            size = buffer.tell()
+            buffer.seek(0)
+            if size < self.batch_bytes:
+                self._defer(self.key(path), buffer.read())
+            else:
+                self.client.put_object(Bucket=self.bucket,
+                                       Key=self.key(path), Body=buffer)
+
+    def write(self, path, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        with self.open(path) as f:
+            f.write(data)
+
+    def _defer(self, key, data):
+        with self._lock:
+            self._pending[key] = data
+            if len(self._pending) < self.batch_size:
+                return
+            batch, self._pending = self._pending, {}
+        self._put_all(batch)
+
+    def _put_all(self, batch):
+        for key, data in batch.items():
+            self.client.put_object(Bucket=self.bucket, Key=key, Body=data)
+
+    def read(self, path):
+        key = self.key(path)
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key]
+        response = self.client.get_object(Bucket=self.bucket, Key=key)
+        return response['Body'].read()
+
+    def size(self, path):
+        key = self.key(path)
+        with self._lock:
+            if key in self._pending:
+                return len(self._pending[key])
+        response = self.client.head_object(Bucket=self.bucket, Key=key)
+        return response['ContentLength']
+
+    def flush(self):
+        """Отправляет отложенные объекты"""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        self._put_all(batch)
+
+
+class _CountingWriter(io.RawIOBase):
+    """Обёртка над файлом, считающая записанные байты"""
+
+    def __init__(self, f):
+        self._f = f
+        self.written = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._f.write(data)
+        self.written += len(data)
+        return len(data)
+
+
+class CompressedStorage:
+    """Хранилище, сжимающее текстовые файлы gzip на лету.
+
+    HTML, CSS, JS и другие файлы из TEXT_EXTENSIONS пишутся поверх
+    storage как <путь>.gz потоково, без сборки файла в памяти; ссылки
+    в страницах по-прежнему ведут на несжатые имена, как ждут
+    веб-серверы с gzip_static. Остальные файлы сохраняются как есть.
+    Индекс <directory>/compressed.json хранит для каждого сжатого файла
+    путь относительно directory, исходный и сжатый размер; он
+    обновляется при flush().
+    """
+
+    def __init__(self, directory, storage=None, level=6,
+                 extensions=TEXT_EXTENSIONS):
+        self.directory = str(directory)
+        self.storage = storage or LOCAL_STORAGE
+        self.level = level
+        self.extensions = tuple(extensions)
+        self.index_path = os.path.join(self.directory, COMPRESSED_INDEX_NAME)
+        self._lock = threading.Lock()
+        self._index = {}
+        self._dirty = False
+
+    def compresses(self, path):
+        """True, если файл по этому пути сохраняется сжатым"""
+        return str(path).lower().endswith(self.extensions)
+
+    def location(self, path):
+        """Путь, по которому файл на самом деле лежит в storage"""
+        if self.compresses(path):
+            return f"{path}{GZIP_SUFFIX}"
+        return path
+
+    def _name(self, path):
+        return os.path.relpath(path, self.directory).replace(os.sep, '/')
+
+    def exists(self, path):
+        return self.storage.exists(path)
+
+    def makedirs(self, path, exist_ok=False):
+        self.storage.makedirs(path, exist_ok=exist_ok)
+
+    @contextlib.contextmanager
+    def open(self, path):
+        if not self.compresses(path):
+            with self.storage.open(path) as f:
+                yield f
+            return
+        with self.storage.open(f"{path}{GZIP_SUFFIX}") as f:
+            counter = _CountingWriter(f)
+            # mtime=0 делает сжатый файл воспроизводимым
+            with gzip.GzipFile(filename='', mode='wb', fileobj=counter,
+                               compresslevel=self.level, mtime=0) as gz:
+                yield gz
+                size = gz.tell()
+        with self._lock:
+            self._index[self._name(path)] = {
+                'path': self._name(path) + GZIP_SUFFIX,
+                'encoding': 'gzip',
+                'size': size,
+                'compressed_size': counter.written,
+            }
+            self._dirty = True
+
+    def write(self, path, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        with self.open(path) as f:
+            f.write(data)
+
+    def read(self, path):
+        if not self.compresses(path):
+            return self.storage.read(path)
+        return gzip.decompress(self.storage.read(f"{path}{GZIP_SUFFIX}"))
+
+    def size(self, path):
+        if not self.compresses(path):
+            return self.storage.size(path)
+        with self._lock:
+            entry = self._index.get(self._name(path))
+        if entry is not None:
+            return entry['size']
+        return len(self.read(path))
+
+    def flush(self):
+        """Дописывает новые записи в индекс и сбрасывает storage"""
+        with self._lock:
+            if self._dirty:
+                try:
+                    index = json.loads(self.storage.read(self.index_path))
+                except (OSError, ValueError):
+                    index = {}
+                if not isinstance(index, dict):
+                    index = {}
+                index.update(self._index)
+                self.storage.write(self.index_path, json.dumps(
+                    index, ensure_ascii=False, indent=2, sort_keys=True))
+                self._dirty = False
+        self.storage.flush()
+
+
+class LocalS3Client:
+    """Замена S3-клиента для тестов и локальной работы.
+
+    Реализует put_object, get_object и head_object поверх директории:
+    объект bucket/key хранится в файле <root>/<bucket>/<key>.
+    """
+
+    def __init__(self, root):
+        self.root = str(root)
+        self.puts = 0
+
+    def _path(self, bucket, key):
+        return os.path.join(self.root, bucket, *key.split('/'))
+
+    def put_object(self, Bucket, Key, Body):
+        path = self._path(Bucket, Key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = Body if isinstance(Body, bytes) else Body.read()
+        LocalStorage().write(path, data)
+        self.puts += 1
+        return {}
+
+    def get_object(self, Bucket, Key):
+        with open(self._path(Bucket, Key), 'rb') as f:
+            return {'Body': io.BytesIO(f.read())}
+
+    def head_object(self, Bucket, Key):
+        return {'ContentLength': os.path.getsize(self._path(Bucket, Key))}
+
+
+LOCAL_STORAGE = LocalStorage()
@@ -0,0 +1,72 @@
+import json
+import logging
+import os
+import zipfile
+
+import pytest
+import requests_mock
+
+from page_loader.archive import read_resource
+from page_loader.page_loader import download
+
+logger = logging.getLogger(__name__)
+
+URL = "https://site.com/page"
+HTML = """<html><body>
+<img src="/a.png">
+<script src="/app.js"></script>
+<img src="/missing.png">
+</body></html>"""
+
+
+def test_download_to_zip(tmp_path):
+    """Тестирование сохранения страницы с ресурсами в один архив"""
+    with requests_mock.Mocker() as m:
+        m.get(URL, text=HTML)
+        m.get("https://site.com/a.png", content=b"png")
+        m.get("https://site.com/app.js", content=b"js")
+        m.get("https://site.com/missing.png", status_code=404)
+        archive_path = download(URL, tmp_path, max_workers=2,
+                                output_format='zip')
+
+    assert archive_path == os.path.join(tmp_path, "site-com-page.zip")
+    assert os.listdir(tmp_path) == ["site-com-page.zip"]
+    with zipfile.ZipFile(archive_path) as archive:
+        assert sorted(archive.namelist()) == [
+            "index.json", "site-com-page.html",
+            "site-com-page_files/site-com-a.png",
+            "site-com-page_files/site-com-app.js"]
+        html = archive.read("site-com-page.html").decode("utf-8")
+        index = json.loads(archive.read("index.json"))
+    assert "site-com-page_files/site-com-a.png" in html
+    assert 'src="/missing.png"' in html
+    assert index["https://site.com/app.js"]["size"] == 2
+    assert read_resource(archive_path, "https://site.com/a.png") == b"png"
+    with pytest.raises(KeyError):
+        read_resource(archive_path, "https://site.com/missing.png")
+
+
+def test_zip_matches_directory_output(tmp_path):
+    """Тестирование: распакованный архив совпадает с обычным выводом"""
+    files_dir = tmp_path / "files"
+    zip_dir = tmp_path / "zip"
+    files_dir.mkdir()
+    zip_dir.mkdir()
+    with requests_mock.Mocker() as m:
+        m.get(URL, text=HTML)
+        m.get("https://site.com/a.png", content=b"png")
+        m.get("https://site.com/app.js", content=b"js")
+        m.get("https://site.com/missing.png", status_code=404)
+        html_path = download(URL, files_dir)
+        archive_path = download(URL, zip_dir, output_format='zip')
+
+    with zipfile.ZipFile(archive_path) as archive:
+        archived = archive.read("site-com-page.html")
+    with open(html_path, 'rb') as f:
+        assert f.read() == archived
+
+
+def test_zip_rejects_incremental(tmp_path):
+    """Тестирование: архив несовместим с инкрементальным режимом"""
+    with pytest.raises(ValueError):
+        download(URL, tmp_path, output_format='zip', incremental=True)
@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import threading
+from pathlib import Path
+
+import pytest
+import requests_mock
+
+from page_loader import async_download, async_loader, download
+
+httpx = pytest.importorskip("httpx")
+
+logger = logging.getLogger(__name__)
+
+URL = "https://ru.hexlet.io/courses"
+PAGE = '''
+<html>
+  <head>
+    <meta charset="utf-8">
+    <link href="/assets/application.css" rel="stylesheet">
+    <script src="/packs/js/runtime.js"></script>
+    <script src="https://cdn.example.com/lib.js"></script>
+  </head>
+  <body>
+    <img src="/assets/professions/python.png"
+         srcset="/assets/professions/python.png 1x, /images/py2x.png 2x" />
+    <img src="/broken.png" />
+    Курсы
+  </body>
+</html>
+'''
+RESOURCES = {
+    "https://ru.hexlet.io/assets/application.css":
+        b'@import "print.css"; body { background: url(/images/bg.png) }',
+    "https://ru.hexlet.io/assets/print.css": b"p { background: url(p.png) }",
+    "https://ru.hexlet.io/assets/p.png": b"p",
+    "https://ru.hexlet.io/images/bg.png": b"bg",
+    "https://ru.hexlet.io/images/py2x.png": b"2x",
+    "https://ru.hexlet.io/packs/js/runtime.js": b"console.log('ok');",
+    "https://ru.hexlet.io/assets/professions/python.png":
+        (Path(__file__).parent / "fixtures/python.png").read_bytes(),
+}
+HEADERS = {"Content-Type": "text/html; charset=utf-8"}
+
+
+def make_client(requested=None):
+    """Создаёт httpx-клиент с подменённым транспортом"""
+    def handler(request):
+        url = str(request.url)
+        if requested is not None:
+            requested.append(url)
+        if url == URL:
+            return httpx.Response(200, content=PAGE.encode(),
+                                  headers=HEADERS)
+        if url in RESOURCES:
+            return httpx.Response(200, content=RESOURCES[url])
+        return httpx.Response(404)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def snapshot(directory):
+    """Возвращает содержимое всех файлов директории"""
+    return {str(p.relative_to(directory)): p.read_bytes()
+            for p in sorted(Path(directory).rglob("*")) if p.is_file()}
+
+
+async def run_async_download(output_dir, **kwargs):
+    async with make_client(kwargs.pop("requested", None)) as client:
+        return await async_download(URL, output_dir, client=client, **kwargs)
+
+
+def test_async_download_matches_sync(tmp_path):
+    """Тестирование: async_download сохраняет те же байты, что download"""
+    sync_dir = tmp_path / "sync"
+    async_dir = tmp_path / "async"
+    sync_dir.mkdir()
+    async_dir.mkdir()
+
+    with requests_mock.Mocker() as m:
+        m.get(URL, content=PAGE.encode(), headers=HEADERS)
+        m.get("https://ru.hexlet.io/broken.png", status_code=404)
+        for url, content in RESOURCES.items():
+            m.get(url, content=content)
+        sync_path = download(URL, sync_dir)
+
+    logger.info("Скачиваем ту же страницу через async_download")
+    requested = []
+    async_path = asyncio.run(run_async_download(async_dir,
+                                                requested=requested))
+
+    assert Path(async_path).name == Path(sync_path).name
+    files = snapshot(async_dir)
+    assert files == snapshot(sync_dir)
+    css = files["ru-hexlet-io-courses_files/"
+                "ru-hexlet-io-assets-application.css"]
+    assert b'@import "ru-hexlet-io-assets-print.css"' in css
+    assert b"url(ru-hexlet-io-images-bg.png)" in css
+    assert "ru-hexlet-io-courses_files/ru-hexlet-io-assets-p.png" in files
+    assert "ru-hexlet-io-courses_files/ru-hexlet-io-images-py2x.png" \
+        in files
+    assert "https://cdn.example.com/lib.js" not in requested
+
+
+def test_async_download_respects_limits(tmp_path):
+    """Тестирование ограничения числа одновременных запросов к хосту"""
+    active = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        if str(request.url) == URL:
+            return httpx.Response(200, headers=HEADERS, content="".join(
+                f'<img src="/img{i}.png">' for i in range(10)).encode())
+        return httpx.Response(200, content=b"png")
+
+    async def run():
+        transport = httpx.MockTransport(handler)
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await async_download(URL, tmp_path, client=client,
+                                        per_host=3)
+
+    asyncio.run(run())
+    assert peak == 3
+    assert len(list((tmp_path / "ru-hexlet-io-courses_files").iterdir())) \
+        == 10
+
+
+def test_async_download_page_error(tmp_path):
+    """Тестирование ошибки HTTP при загрузке страницы"""
+    async def run():
+        transport = httpx.MockTransport(lambda request: httpx.Response(503))
+        async with httpx.AsyncClient(transport=transport) as client:
+            await async_download(URL, tmp_path, client=client)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(run())
+
+
+def test_async_download_keeps_loop_free(tmp_path, monkeypatch):
+    """Тестирование: разбор и запись файлов не идут в цикле событий"""
+    threads = {}
+
+    def record(name, func):
+        def wrapper(*args, **kwargs):
+            threads[name] = threading.get_ident()
+            return func(*args, **kwargs)
+        monkeypatch.setattr(async_loader, name, wrapper)
+
+    for name in ("prepare_page", "scan_stylesheets", "rewrite_stylesheets",
+                 "finish_page"):
+        record(name, getattr(async_loader, name))
+
+    async def run():
+        threads["loop"] = threading.get_ident()
+        await run_async_download(tmp_path)
+
+    asyncio.run(run())
+
+    loop_thread = threads.pop("loop")
+    assert len(threads) == 4
+    assert loop_thread not in threads.values()
@@ -0,0 +1,125 @@
+import logging
+import sys
+
+import requests_mock
+
+from page_loader import cli
+from page_loader.batch import ResourceStore, download_batch, read_urls
+
+logger = logging.getLogger(__name__)
+
+PAGE = '''
+<html>
+  <head>
+    <link href="/assets/application.css" rel="stylesheet">
+    <script src="/packs/js/{name}.js"></script>
+  </head>
+</html>
+'''
+CSS_URL = "https://ru.hexlet.io/assets/application.css"
+
+
+def mock_site(m, names):
+    """Регистрирует страницы с общим CSS и собственным JS"""
+    m.get(CSS_URL, content=b"body {}")
+    for name in names:
+        m.get(f"https://ru.hexlet.io/{name}", text=PAGE.format(name=name))
+        m.get(f"https://ru.hexlet.io/packs/js/{name}.js",
+              content=name.encode())
+
+
+def test_download_batch_deduplicates_resources(tmp_path):
+    """Тестирование: общий ресурс скачивается один раз на все страницы"""
+    names = ["courses", "blog", "about"]
+    urls = [f"https://ru.hexlet.io/{name}" for name in names]
+
+    with requests_mock.Mocker() as m:
+        mock_site(m, names)
+        logger.info("Скачиваем %s страницы пакетом", len(urls))
+        results = download_batch(urls + urls[:1], tmp_path, page_workers=3,
+                                 max_workers=2)
+        css_requests = [r for r in m.request_history if r.url == CSS_URL]
+
+    assert len(css_requests) == 1
+    assert list(results) == urls
+
+    shared = tmp_path / "shared_files"
+    assert sorted(p.name for p in shared.iterdir()) == [
+        "ru-hexlet-io-assets-application.css",
+        "ru-hexlet-io-packs-js-about.js",
+        "ru-hexlet-io-packs-js-blog.js",
+        "ru-hexlet-io-packs-js-courses.js",
+    ]
+    assert list(tmp_path.glob("*_files")) == [shared]
+
+    html = (tmp_path / "ru-hexlet-io-blog.html").read_text(encoding="utf-8")
+    assert ('href="shared_files/ru-hexlet-io-assets-application.css"'
+            in html)
+    assert 'src="shared_files/ru-hexlet-io-packs-js-blog.js"' in html
+
+
+def test_download_batch_reports_failed_pages(tmp_path):
+    """Тестирование: ошибка одной страницы не прерывает пакет"""
+    store = ResourceStore(tmp_path / "store")
+    with requests_mock.Mocker() as m:
+        mock_site(m, ["courses"])
+        m.get("https://ru.hexlet.io/missing", status_code=404)
+        results = download_batch(["https://ru.hexlet.io/missing",
+                                  "https://ru.hexlet.io/courses"],
+                                 tmp_path, store=store)
+
+    assert results["https://ru.hexlet.io/missing"] is None
+    assert results["https://ru.hexlet.io/courses"].endswith(
+        "ru-hexlet-io-courses.html")
+    assert len(store) == 2
+    html = (tmp_path / "ru-hexlet-io-courses.html").read_text(
+        encoding="utf-8")
+    assert 'src="store/ru-hexlet-io-packs-js-courses.js"' in html
+
+
+def test_read_urls(tmp_path):
+    """Тестирование чтения списка URL из файла"""
+    path = tmp_path / "urls.txt"
+    path.write_text("# страницы\nhttps://a.io/x\n\n  https://b.io/y  # y\n",
+                    encoding="utf-8")
+    assert read_urls(path) == ["https://a.io/x", "https://b.io/y"]
+
+
+def test_cli_batch_from_file(capsys, monkeypatch, tmp_path):
+    """Тестирование пакетного режима CLI со списком URL в файле"""
+    urls_file = tmp_path / "urls.txt"
+    urls_file.write_text("https://ru.hexlet.io/courses\n"
+                         "https://ru.hexlet.io/blog\n", encoding="utf-8")
+    monkeypatch.setattr(sys, "argv", ["page-loader", "-i", str(urls_file),
+                                      "-o", str(tmp_path)])
+
+    with requests_mock.Mocker() as m:
+        mock_site(m, ["courses", "blog"])
+        cli.main()
+
+    out = capsys.readouterr().out.split()
+    assert out == [str(tmp_path / "ru-hexlet-io-courses.html"),
+                   str(tmp_path / "ru-hexlet-io-blog.html")]
+
+
+def test_download_batch_names_do_not_depend_on_page_order(tmp_path):
+    """Тестирование: имена ресурсов одинаковы при любом порядке страниц"""
+    pages = {
+        "https://site.com/a": '<img src="/x/y.png">',
+        "https://site.com/b": '<img src="/x-y.png">',
+    }
+    shared = {}
+    for order, urls in enumerate([list(pages), list(pages)[::-1]]):
+        output_dir = tmp_path / str(order)
+        output_dir.mkdir()
+        with requests_mock.Mocker() as m:
+            for url, html in pages.items():
+                m.get(url, text=html)
+            m.get("https://site.com/x/y.png", content=b"slash")
+            m.get("https://site.com/x-y.png", content=b"dash")
+            download_batch(urls, output_dir)
+        shared[order] = {p.name: p.read_bytes()
+                         for p in (output_dir / "shared_files").iterdir()}
+
+    assert shared[0] == shared[1]
+    assert shared[0]["site-com-x-y.png"] == b"slash"
@@ -0,0 +1,41 @@
+from benchmarks import bench_startup
+from benchmarks.bench_download import compare, percentile, run_suite
+
+
+def test_benchmark_suite_smoke():
+    """Тестирование: бенчмарк запускается и скачивает все ресурсы"""
+    report = run_suite(["deep_dom"], 2, {"max_workers": 2})
+    metrics = report["scenarios"]["deep_dom"]
+
+    assert metrics["assets_saved"] == 2 * metrics["assets_per_page"]
+    assert metrics["pages_per_sec"] > 0
+    assert metrics["p50_seconds"] <= metrics["p99_seconds"]
+    assert metrics["peak_rss_bytes"] > 0
+    assert "deep_dom" in compare(report, report)
+
+
+def test_percentile():
+    """Тестирование перцентиля по ближайшему рангу"""
+    values = list(range(1, 101))
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile([7], 0.99) == 7
+
+
+def test_benchmark_in_memory():
+    """Тестирование бенчмарка с хранилищем в памяти"""
+    report = run_suite(["many_assets"], 1, {"storage": "memory"})
+    metrics = report["scenarios"]["many_assets"]
+
+    assert metrics["assets_saved"] == metrics["assets_per_page"]
+
+
+def test_startup_benchmark_skips_heavy_imports():
+    """Тестирование: справка и проверка аргументов без requests и bs4"""
+    report = bench_startup.run_suite(["python", "help", "invalid_args"], 1)
+    commands = report["commands"]
+
+    assert commands["help"]["heavy_modules"] == []
+    assert commands["invalid_args"]["heavy_modules"] == []
+    assert commands["help"]["p50_seconds"] > 0
+    assert "help" in bench_startup.compare(report, report)
@@ -0,0 +1,133 @@
+import logging
+import os
+
+import pytest
+import requests_mock
+
+from page_loader.cache import ResourceCache
+from page_loader.filters import ResourceFilter, ResourceFilteredError
+from page_loader.page_loader import (ResourceTooLargeError, download,
+                                     download_resource)
+
+logger = logging.getLogger(__name__)
+
+URL = "https://ru.hexlet.io/courses"
+IMG_URL = "https://ru.hexlet.io/img.png"
+PAGE = '<html><body><img src="/img.png"></body></html>'
+
+
+def test_cache_serves_repeat_downloads(tmp_path):
+    """Тестирование: повторная загрузка ресурса берётся из кеша"""
+    cache_dir = tmp_path / "cache"
+    first = tmp_path / "first"
+    second = tmp_path / "second"
+    first.mkdir()
+    second.mkdir()
+
+    with requests_mock.Mocker() as m:
+        m.get(URL, text=PAGE)
+        m.get(IMG_URL, content=b"png-data")
+
+        download(URL, first, cache=ResourceCache(cache_dir))
+        logger.info("Новый экземпляр кеша читает индекс с диска")
+        cache = ResourceCache(cache_dir)
+        download(URL, second, cache=cache)
+        img_requests = [r for r in m.request_history if r.url == IMG_URL]
+
+    assert len(img_requests) == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 0
+    img_path = second / "ru-hexlet-io-courses_files" / "ru-hexlet-io-img.png"
+    assert img_path.read_bytes() == b"png-data"
+
+
+def test_cache_deduplicates_content_and_evicts(tmp_path):
+    """Тестирование хранения по содержимому и LRU-вытеснения"""
+    cache = ResourceCache(tmp_path / "cache", max_bytes=10)
+
+    with requests_mock.Mocker() as m:
+        m.get("https://a.io/1", content=b"aaaa")
+        m.get("https://a.io/2", content=b"aaaa")
+        m.get("https://a.io/3", content=b"bbbb")
+        m.get("https://a.io/4", content=b"cccc")
+        for name in ("1", "2", "3"):
+            download_resource(f"https://a.io/{name}",
+                              str(tmp_path / "out" / name), cache=cache)
+        assert cache.stats()["objects"] == 2
+
+        logger.info("Обращаемся к 'aaaa', чтобы вытеснился 'bbbb'")
+        assert cache.get("https://a.io/2", str(tmp_path / "copy"))
+        download_resource("https://a.io/4", str(tmp_path / "out" / "4"),
+                          cache=cache)
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] == 8
+    assert not cache.get("https://a.io/3", str(tmp_path / "miss"))
+    assert cache.get("https://a.io/1", str(tmp_path / "hit"))
+    assert (tmp_path / "hit").read_bytes() == b"aaaa"
+
+
+def test_cache_skips_truncated_resources(tmp_path):
+    """Тестирование: обрезанный ресурс не попадает в кеш"""
+    cache = ResourceCache(tmp_path / "cache", link=False)
+    with requests_mock.Mocker() as m:
+        m.get(IMG_URL, content=b"x" * 100)
+        download_resource(IMG_URL, str(tmp_path / "img.png"), max_size=10,
+                          on_oversize="truncate", cache=cache)
+
+    assert cache.stats()["objects"] == 0
+    assert os.path.getsize(tmp_path / "img.png") == 10
+
+
+@pytest.mark.parametrize("on_oversize", ["skip", "truncate"])
+def test_cache_hit_respects_max_size(tmp_path, on_oversize):
+    """Тестирование: ресурс из кеша тоже ограничен max_size"""
+    cache = ResourceCache(tmp_path / "cache", link=False)
+    save_path = tmp_path / "img.png"
+    with requests_mock.Mocker() as m:
+        m.get(IMG_URL, content=b"x" * 1000)
+        download_resource(IMG_URL, str(tmp_path / "full.png"), cache=cache)
+        m.reset_mock()
+        if on_oversize == "skip":
+            with pytest.raises(ResourceTooLargeError):
+                download_resource(IMG_URL, str(save_path), max_size=10,
+                                  cache=cache)
+        else:
+            download_resource(IMG_URL, str(save_path), max_size=10,
+                              on_oversize="truncate", cache=cache)
+        requests_made = m.call_count
+
+    if on_oversize == "skip":
+        assert not save_path.exists()
+        assert requests_made == 0
+    else:
+        assert save_path.read_bytes() == b"x" * 10
+    assert cache.stats()["hits"] == 0
+
+
+def test_cache_hit_respects_mime_filter(tmp_path):
+    """Тестирование: фильтр по Content-Type действует и на кеш"""
+    cache_dir = tmp_path / "cache"
+    images = ResourceFilter(mime_types=["image/*"])
+    with requests_mock.Mocker() as m:
+        m.get(IMG_URL, content=b"png", headers={"Content-Type": "image/png"})
+        first = ResourceCache(cache_dir)
+        download_resource(IMG_URL, str(tmp_path / "full.png"), cache=first)
+        first.save()
+        m.reset_mock()
+
+        cache = ResourceCache(cache_dir)
+        download_resource(IMG_URL, str(tmp_path / "img.png"), cache=cache,
+                          resource_filter=images)
+        with pytest.raises(ResourceFilteredError):
+            download_resource(IMG_URL, str(tmp_path / "css.png"),
+                              cache=cache,
+                              resource_filter=ResourceFilter(
+                                  mime_types=["text/css"]))
+        requests_made = m.call_count
+
+    assert requests_made == 0
+    assert cache.stats()["hits"] == 1
+    assert (tmp_path / "img.png").read_bytes() == b"png"
+    assert not (tmp_path / "css.png").exists()
@@ -0,0 +1,105 @@
+import logging
+import os
+import time
+
+import pytest
+import requests
+import requests_mock
+
+from page_loader.deadline import Deadline, DeadlineExceeded
+from page_loader.defaults import DEFAULT_TIMEOUT
+from page_loader.metrics import Metrics
+from page_loader.page_loader import download
+from page_loader.ratelimit import HostRateLimiter
+from page_loader.retry import fetch_with_retry
+
+logger = logging.getLogger(__name__)
+
+URL = "https://site.com/page"
+HTML = """<html><body>
+<img src="/a.png">
+<script src="/slow.js"></script>
+<link href="/c.css">
+</body></html>"""
+
+
+def test_deadline_clamps_timeouts():
+    """Тестирование ограничения таймаутов оставшимся временем"""
+    deadline = Deadline(5)
+
+    connect, read = deadline.clamp((1, 30))
+    assert connect == 1
+    assert 4 < read <= 5
+    assert deadline.clamp(None) <= 5
+    assert Deadline.coerce(None) is None
+    assert Deadline.coerce(deadline) is deadline
+    with pytest.raises(ValueError):
+        Deadline(0)
+
+
+def test_fetch_with_retry_respects_deadline():
+    """Тестирование: запрос после истечения срока не отправляется"""
+    deadline = Deadline(0.01)
+    time.sleep(0.02)
+
+    with requests_mock.Mocker() as m:
+        m.get(URL, text="ok")
+        with pytest.raises(DeadlineExceeded):
+            fetch_with_retry(requests.Session(), URL, deadline=deadline)
+        assert m.call_count == 0
+
+
+def test_download_passes_timeout(tmp_path):
+    """Тестирование таймаутов по умолчанию для страницы и ресурсов"""
+    with requests_mock.Mocker() as m:
+        m.get(URL, text='<img src="/a.png">')
+        m.get("https://site.com/a.png", content=b"png")
+        download(URL, tmp_path)
+
+    assert [r.timeout for r in m.request_history] == [DEFAULT_TIMEOUT] * 2
+
+
+def test_download_deadline_saves_partial_page(tmp_path, caplog):
+    """Тестирование: по истечении срока сохраняется частичный результат"""
+    def slow(request, context):
+        time.sleep(0.3)
+        return b"js"
+
+    metrics = Metrics()
+    with requests_mock.Mocker() as m:
+        m.get(URL, text=HTML)
+        m.get("https://site.com/a.png", content=b"png")
+        m.get("https://site.com/slow.js", content=slow)
+        m.get("https://site.com/c.css", content=b"css")
+        html_path = download(URL, tmp_path, deadline=0.2, metrics=metrics)
+        requested = [r.url for r in m.request_history]
+
+    assert "https://site.com/c.css" not in requested
+    with open(html_path, encoding="utf-8") as f:
+        html = f.read()
+    assert "site-com-page_files/site-com-a.png" in html
+    assert 'src="/slow.js"' in html
+    assert 'href="/c.css"' in html
+    assert sorted(os.listdir(tmp_path / "site-com-page_files")) == \
+        ["site-com-a.png"]
+    statuses = metrics.report()['totals']['statuses']
+    assert statuses == {'ok': 1, 'deadline': 1}
+    assert "Ошибка при сохранении" not in caplog.text
+
+
+def test_rate_limit_wait_respects_deadline(tmp_path):
+    """Тестирование: очередь ограничителя частоты не держит дольше срока"""
+    images = [f"/{i}.png" for i in range(6)]
+    html = "".join(f'<img src="{src}">' for src in images)
+
+    with requests_mock.Mocker() as m:
+        m.get(URL, text=html)
+        for src in images:
+            m.get("https://site.com" + src, content=b"png")
+        started = time.monotonic()
+        download(URL, tmp_path, max_workers=6, deadline=0.5,
+                 rate_limiter=HostRateLimiter(1))
+        elapsed = time.monotonic() - started
+
+    assert elapsed < 1.5
+    assert 1 <= m.call_count < 1 + len(images)
@@ -0,0 +1,170 @@
+import logging
+
+import pytest
+import requests_mock
+
+from page_loader.css import split_css
+from page_loader.document import make_document, resolve_parser, split_srcset
+from page_loader.page_loader import download
+
+logger = logging.getLogger(__name__)
+
+URL = "https://ru.hexlet.io/courses"
+PAGE = '''<!DOCTYPE html>
+<html>
+<head><LINK rel="stylesheet" HREF = '/assets/app.css'>
+<script src=/packs/runtime.js defer></script></head>
+<body>
+  <!-- <img src="/commented.png"> -->
+  <img alt='src="/fake.png"' src="/img.png"/>
+  <img src="https://cdn.example.com/ext.png">
+  <p>Текст   с   пробелами</p>
+</body>
+</html>
+'''
+EXPECTED = '''<!DOCTYPE html>
+<html>
+<head><LINK rel="stylesheet" HREF = 'ru-hexlet-io-courses_files/\
+ru-hexlet-io-assets-app.css'>
+<script src="ru-hexlet-io-courses_files/ru-hexlet-io-packs-runtime.js" \
+defer></script></head>
+<body>
+  <!-- <img src="/commented.png"> -->
+  <img alt='src="/fake.png"' src="ru-hexlet-io-courses_files/\
+ru-hexlet-io-img.png"/>
+  <img src="https://cdn.example.com/ext.png">
+  <p>Текст   с   пробелами</p>
+</body>
+</html>
+'''
+
+
+def mock_page(m):
+    m.get(URL, text=PAGE)
+    m.get("https://ru.hexlet.io/assets/app.css", content=b"css")
+    m.get("https://ru.hexlet.io/packs/runtime.js", content=b"js")
+    m.get("https://ru.hexlet.io/img.png", content=b"png")
+
+
+def test_minimal_rewrite_changes_only_links(tmp_path):
+    """Тестирование: в режиме minimal меняются только ссылки на ресурсы"""
+    with requests_mock.Mocker() as m:
+        mock_page(m)
+        path = download(URL, tmp_path, rewrite="minimal")
+        requested = {r.url for r in m.request_history}
+
+    with open(path, encoding="utf-8", newline="") as f:
+        assert f.read() == EXPECTED
+    assert "https://ru.hexlet.io/commented.png" not in requested
+    assert "https://ru.hexlet.io/fake.png" not in requested
+
+
+@pytest.mark.parametrize("rewrite", ["prettify", "minimal"])
+def test_rewrite_modes_find_same_resources(rewrite):
+    """Тестирование: оба режима находят одни и те же ресурсы"""
+    document = make_document(PAGE, rewrite=rewrite)
+    links = [(tag.lower(), attr, value)
+             for _, tag, attr, value in document.links()]
+    assert links == [
+        ("link", "href", "/assets/app.css"),
+        ("script", "src", "/packs/runtime.js"),
+        ("img", "src", "/img.png"),
+        ("img", "src", "https://cdn.example.com/ext.png"),
+    ]
+
+
+def test_lxml_parser(tmp_path):
+    """Тестирование загрузки с парсером lxml"""
+    pytest.importorskip("lxml")
+    assert resolve_parser("auto") == "lxml"
+
+    with requests_mock.Mocker() as m:
+        mock_page(m)
+        path = download(URL, tmp_path, parser="lxml")
+
+    html = (tmp_path / "ru-hexlet-io-courses.html").read_text(
+        encoding="utf-8")
+    assert path.endswith("ru-hexlet-io-courses.html")
+    assert 'src="ru-hexlet-io-courses_files/ru-hexlet-io-img.png"' in html
+
+
+def test_unknown_parser(tmp_path):
+    """Тестирование ошибки при неизвестном парсере"""
+    with pytest.raises(ValueError):
+        download(URL, tmp_path, parser="html5lib")
+
+
+MEDIA_PAGE = '''<html><head><style>
+@import "/css/print.css";
+body { background: url('/bg.png') }
+</style></head><body>
+<img src="/a.png" srcset="/a-2x.png 2x, /a-3x.png 3x">
+<picture><source srcset="/b.webp 640w,/b-big.webp 1280w"></picture>
+<video poster="/poster.jpg"><source src="/clip.mp4"></video>
+<div style="background-image: url(/tile.png)">x</div>
+<img src="data:image/png;base64,AAAA">
+</body></html>
+'''
+MEDIA_URLS = ["/css/print.css", "/bg.png", "/a.png", "/a-2x.png",
+              "/a-3x.png", "/b.webp", "/b-big.webp", "/poster.jpg",
+              "/clip.mp4", "/tile.png", "data:image/png;base64,AAAA"]
+
+
+def test_split_srcset_and_css():
+    """Тестирование разбора srcset и CSS на ссылки и остальной текст"""
+    value = "a.png 1x,b.png, c(1).png 640w"
+    parts = split_srcset(value)
+    assert "".join(parts) == value
+    assert parts[1::2] == ["a.png", "b.png", "c(1).png"]
+
+    css = '/* url(old.png) */ @import url("a.css"); @import \'b.css\';' \
+          'p { src: url( font.woff2 ) }'
+    parts = split_css(css)
+    assert "".join(parts) == css
+    assert parts[1::2] == ["a.css", "b.css", "font.woff2"]
+
+
+@pytest.mark.parametrize("rewrite", ["prettify", "minimal"])
+def test_media_links_found_and_rewritten(rewrite):
+    """Тестирование srcset, <source>, poster, style и <style>"""
+    document = make_document(MEDIA_PAGE, rewrite=rewrite)
+    links = document.links()
+    assert [value for _, _, _, value in links] == MEDIA_URLS
+
+    for ref, _, attr, value in links:
+        document.set_link(ref, attr, "local" + value.replace("/", "-"))
+    html = document.render()
+    assert '@import "local-css-print.css"' in html
+    assert "url('local-bg.png')" in html
+    assert "local-a-2x.png 2x, local-a-3x.png 3x" in html
+    assert "local-b.webp 640w,local-b-big.webp 1280w" in html
+    assert "url(local-tile.png)" in html
+    assert 'poster="local-poster.jpg"' in html
+
+
+def test_download_rewrites_css_files(tmp_path):
+    """Тестирование загрузки ресурсов из CSS-файлов и цепочки @import"""
+    page = '''<html><head><link rel="stylesheet" href="/css/app.css">
+</head><body><img srcset="/img/a.png 2x"></body></html>'''
+    with requests_mock.Mocker() as m:
+        m.get(URL, text=page)
+        m.get("https://ru.hexlet.io/css/app.css",
+              text='@import "base.css"; .i { background: url(../img/a.png) }'
+                   ' @font-face { src: url(https://cdn.io/f.woff) }')
+        m.get("https://ru.hexlet.io/css/base.css",
+              text="body { background: url('/img/bg.png#x') }")
+        m.get("https://ru.hexlet.io/img/a.png", content=b"a")
+        m.get("https://ru.hexlet.io/img/bg.png", content=b"bg")
+        download(URL, tmp_path)
+        requested = [r.url for r in m.request_history]
+
+    files = tmp_path / "ru-hexlet-io-courses_files"
+    assert (files / "ru-hexlet-io-css-app.css").read_text() == (
+        '@import "ru-hexlet-io-css-base.css"; '
+        '.i { background: url(ru-hexlet-io-img-a.png) }'
+        ' @font-face { src: url(https://cdn.io/f.woff) }')
+    assert (files / "ru-hexlet-io-css-base.css").read_text() == \
+        "body { background: url('ru-hexlet-io-img-bg.png#x') }"
+    assert (files / "ru-hexlet-io-img-bg.png").read_bytes() == b"bg"
+    assert requested.count("https://ru.hexlet.io/img/a.png") == 1
+    assert "https://cdn.io/f.woff" not in requested
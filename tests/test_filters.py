@@ -0,0 +1,107 @@
+import logging
+import sys
+
+import requests_mock
+
+from page_loader import cli
+from page_loader.filters import PAGE_LINK_RELS, ResourceFilter
+from page_loader.metrics import Metrics
+from page_loader.page_loader import download
+
+logger = logging.getLogger(__name__)
+
+URL = "https://site.com/page"
+HTML = """<html><head>
+<link rel="stylesheet" href="/app.css">
+<link rel="canonical" href="/page">
+<link rel="alternate" type="application/rss+xml" href="/feed.xml">
+<script src="/app.js"></script>
+</head><body><img src="/a.png"><img src="/big.png"></body></html>"""
+
+
+def mock_site(m):
+    m.get(URL, text=HTML)
+    m.get("https://site.com/app.css", text="body {}",
+          headers={"Content-Type": "text/css"})
+    m.get("https://site.com/app.js", text="js",
+          headers={"Content-Type": "text/javascript"})
+    m.get("https://site.com/a.png", content=b"png",
+          headers={"Content-Type": "image/png"})
+    m.get("https://site.com/big.png", content=b"x" * 100,
+          headers={"Content-Type": "image/png"})
+
+
+def fetched(m):
+    return {r.url for r in m.request_history if r.method == "GET"} - {URL}
+
+
+def test_filter_by_rel_and_extension(tmp_path):
+    """Тестирование отбора ссылок по rel и расширению при разборе"""
+    with requests_mock.Mocker() as m:
+        mock_site(m)
+        download(URL, tmp_path,
+                 resource_filter=ResourceFilter(rels=PAGE_LINK_RELS))
+        assert fetched(m) == {"https://site.com/app.css",
+                              "https://site.com/app.js",
+                              "https://site.com/a.png",
+                              "https://site.com/big.png"}
+
+    (tmp_path / "second").mkdir()
+    with requests_mock.Mocker() as m:
+        mock_site(m)
+        download(URL, tmp_path / "second", resource_filter=ResourceFilter(
+            tags=["img", "link"], extensions=[".PNG", "css"]))
+        assert fetched(m) == {"https://site.com/app.css",
+                              "https://site.com/a.png",
+                              "https://site.com/big.png"}
+
+
+def test_filter_by_mime_type(tmp_path):
+    """Тестирование отбора по Content-Type до чтения тела"""
+    metrics = Metrics()
+    with requests_mock.Mocker() as m:
+        mock_site(m)
+        html_path = download(URL, tmp_path, metrics=metrics,
+                             resource_filter=ResourceFilter(
+                                 rels=["stylesheet"],
+                                 mime_types=["image/*", "text/css"]))
+
+    with open(html_path, encoding="utf-8") as f:
+        assert 'src="/app.js"' in f.read()
+    resource_dir = tmp_path / "site-com-page_files"
+    files = sorted(p.name for p in resource_dir.iterdir())
+    assert files == ["site-com-a.png", "site-com-app.css", "site-com-big.png"]
+    assert metrics.report()["totals"]["statuses"] == {"ok": 3, "filtered": 1}
+
+
+def test_head_prefetch_skips_large_resources(tmp_path):
+    """Тестирование: по HEAD большой ресурс отбрасывается без GET"""
+    with requests_mock.Mocker() as m:
+        mock_site(m)
+        m.head("https://site.com/big.png",
+               headers={"Content-Length": "100", "Content-Type": "image/png"})
+        m.head("https://site.com/a.png",
+               headers={"Content-Length": "3", "Content-Type": "image/png"})
+        m.head("https://site.com/app.js", status_code=405)
+        download(URL, tmp_path, max_size=10,
+                 resource_filter=ResourceFilter(tags=["img", "script"],
+                                                head=True))
+        assert fetched(m) == {"https://site.com/a.png",
+                              "https://site.com/app.js"}
+
+
+def test_cli_builds_filter(monkeypatch, tmp_path):
+    """Тестирование опций фильтрации в CLI"""
+    calls = []
+    monkeypatch.setattr("page_loader.page_loader.download",
+                        lambda url, output, **kw: calls.append(kw) or "p")
+    monkeypatch.setattr(sys, "argv", [
+        "page-loader", URL, "-o", str(tmp_path), "--tags", "img,link",
+        "--mime-types", "image/*", "--head"])
+    cli.main()
+
+    resource_filter = calls[0]["resource_filter"]
+    assert resource_filter.tags == {"img", "link"}
+    assert resource_filter.accepts_type("image/webp")
+    assert not resource_filter.accepts_type("text/html; charset=utf-8")
+    assert resource_filter.head
@@ -0,0 +1,202 @@
+import io
+import logging
+
+import requests_mock
+
+from page_loader.journal import Journal
+from page_loader.page_loader import download
+
+logger = logging.getLogger(__name__)
+
+URL = "https://ru.hexlet.io/courses"
+CSS_URL = "https://ru.hexlet.io/assets/application.css"
+IMG_URL = "https://ru.hexlet.io/images/big.png"
+PAGE = '''
+<html>
+  <head>
+    <link href="/assets/application.css" rel="stylesheet">
+  </head>
+  <body><img src="/images/big.png"></body>
+</html>
+'''
+CSS = b"body { background: white; }"
+IMG = bytes(range(256)) * 1024
+
+
+class BrokenStream(io.RawIOBase):
+    """Тело ответа, которое обрывается после limit байт"""
+
+    def __init__(self, data, limit):
+        self._data = io.BytesIO(data[:limit])
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = self._data.readinto(buffer)
+        if not count:
+            raise ConnectionResetError("соединение разорвано")
+        return count
+
+
+def ranged_image(request, context):
+    """Отдаёт остаток картинки, если ETag совпадает с If-Range"""
+    context.headers["ETag"] = '"v1"'
+    requested = request.headers.get("Range")
+    if requested and request.headers.get("If-Range") == '"v1"':
+        start = int(requested[len("bytes="):-1])
+        context.status_code = 206
+        context.headers["Content-Range"] = \
+            f"bytes {start}-{len(IMG) - 1}/{len(IMG)}"
+        return IMG[start:]
+    return IMG
+
+
+def test_resume_after_interrupted_download(tmp_path):
+    """Тестирование: повторный запуск докачивает только недостающее"""
+    files_dir = tmp_path / "ru-hexlet-io-courses_files"
+    img_path = files_dir / "ru-hexlet-io-images-big.png"
+    journal_path = tmp_path / "ru-hexlet-io-courses_files.journal"
+
+    with requests_mock.Mocker() as m:
+        m.get(URL, text=PAGE)
+        m.get(CSS_URL, content=CSS)
+        m.get(IMG_URL, headers={"ETag": '"v1"'},
+              body=BrokenStream(IMG, 100_000))
+        download(URL, tmp_path, resume=True)
+
+    assert img_path.with_name(img_path.name + ".part").exists()
+    assert journal_path.exists()
+
+    with requests_mock.Mocker() as m:
+        m.get(URL, text=PAGE)
+        m.get(CSS_URL, content=CSS)
+        m.get(IMG_URL, content=ranged_image)
+        logger.info("Продолжаем прерванную загрузку")
+        html_path = download(URL, tmp_path, resume=True)
+        requested = [r.url for r in m.request_history]
+        ranges = [r.headers.get("Range") for r in m.request_history]
+
+    assert requested == [URL, IMG_URL]
+    partial = int(ranges[-1][len("bytes="):-1])
+    assert 0 < partial <= 100_000
+    assert img_path.read_bytes() == IMG
+    assert (files_dir / "ru-hexlet-io-assets-application.css").read_bytes() \
+        == CSS
+    assert 'src="ru-hexlet-io-courses_files/ru-hexlet-io-images-big.png"' \
+        in open(html_path, encoding="utf-8").read()
+    assert not journal_path.exists()
+    assert list(files_dir.glob("*.part")) == []
+
+
+def test_resume_restarts_changed_resource(tmp_path):
+    """Тестирование: изменившийся ресурс скачивается заново целиком"""
+    files_dir = tmp_path / "ru-hexlet-io-courses_files"
+    files_dir.mkdir()
+    img_path = files_dir / "ru-hexlet-io-images-big.png"
+    img_path.with_name(img_path.name + ".part").write_bytes(b"old" * 10)
+    journal = Journal(str(tmp_path / "ru-hexlet-io-courses_files.journal"))
+    journal.start(IMG_URL, {"ETag": '"v0"'})
+
+    with requests_mock.Mocker() as m:
+        m.get(URL, text=PAGE)
+        m.get(CSS_URL, content=CSS)
+        m.get(IMG_URL, content=ranged_image)
+        download(URL, tmp_path, resume=True)
+        img_request = m.request_history[-1]
+
+    assert img_request.headers["If-Range"] == '"v0"'
+    assert img_path.read_bytes() == IMG
+
+
+def test_journal_skips_torn_record(tmp_path):
+    """Тестирование: оборванная при сбое запись журнала пропускается"""
+    path = tmp_path / "files.journal"
+    saved = tmp_path / "files" / "a.png"
+    saved.parent.mkdir()
+    saved.write_bytes(b"12345")
+    journal = Journal(str(path))
+    journal.start("https://h/a.png", {"ETag": 'W/"weak"',
+                                      "Last-Modified": "Mon"})
+    journal.finish("https://h/a.png", 5)
+    journal.start("https://h/b.png", {"ETag": '"b"'})
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"url": "https://h/b.png", "sta')
+
+    loaded = Journal.load(str(path))
+
+    assert loaded.completed("https://h/a.png", str(saved))
+    assert not loaded.completed("https://h/b.png", str(saved))
+    assert loaded.range_headers("https://h/b.png", 3) == {
+        "Range": "bytes=3-", "If-Range": '"b"'}
+    assert loaded.range_headers("https://h/b.png", 0) == {}
+
+
+def test_journal_appends_after_torn_record(tmp_path):
+    """Тестирование: запись после оборванной строки не теряется"""
+    path = tmp_path / "files.journal"
+    saved = tmp_path / "u3.png"
+    saved.write_bytes(b"12345")
+    path.write_text('{"url": "u1", "state": "started"}\n'
+                    '{"url": "u2", "sta', encoding="utf-8")
+
+    journal = Journal.load(str(path))
+    journal.start("u3", {"ETag": '"v3"'})
+    journal.finish("u3", 5)
+    reloaded = Journal.load(str(path))
+
+    assert reloaded.completed("u3", str(saved))
+    assert path.read_text(encoding="utf-8").count("\n") == 3
+
+
+def unsatisfiable_range(request, context):
+    """Отвечает 416 на любой Range, как сервер на запрос после конца"""
+    context.headers["ETag"] = '"v1"'
+    if request.headers.get("Range"):
+        context.status_code = 416
+        context.headers["Content-Range"] = f"bytes */{len(IMG)}"
+        return b"Range Not Satisfiable"
+    return IMG
+
+
+def test_resume_finishes_complete_part(tmp_path):
+    """Тестирование: дописанный до конца .part сохраняется без загрузки"""
+    files_dir = tmp_path / "ru-hexlet-io-courses_files"
+    files_dir.mkdir()
+    img_path = files_dir / "ru-hexlet-io-images-big.png"
+    img_path.with_name(img_path.name + ".part").write_bytes(IMG)
+    journal = Journal(str(tmp_path / "ru-hexlet-io-courses_files.journal"))
+    journal.start(IMG_URL, {"ETag": '"v1"'})
+
+    with requests_mock.Mocker() as m:
+        m.get(URL, text=PAGE)
+        m.get(CSS_URL, content=CSS)
+        m.get(IMG_URL, content=unsatisfiable_range)
+        download(URL, tmp_path, resume=True)
+        img_requests = [r for r in m.request_history if r.url == IMG_URL]
+
+    assert len(img_requests) == 1
+    assert img_path.read_bytes() == IMG
+    assert list(files_dir.glob("*.part")) == []
+
+
+def test_resume_refetches_unsatisfiable_part(tmp_path):
+    """Тестирование: .part длиннее ресурса скачивается заново"""
+    files_dir = tmp_path / "ru-hexlet-io-courses_files"
+    files_dir.mkdir()
+    img_path = files_dir / "ru-hexlet-io-images-big.png"
+    img_path.with_name(img_path.name + ".part").write_bytes(IMG + b"tail")
+    journal = Journal(str(tmp_path / "ru-hexlet-io-courses_files.journal"))
+    journal.start(IMG_URL, {"ETag": '"v1"'})
+
+    with requests_mock.Mocker() as m:
+        m.get(URL, text=PAGE)
+        m.get(CSS_URL, content=CSS)
+        m.get(IMG_URL, content=unsatisfiable_range)
+        download(URL, tmp_path, resume=True)
+        ranges = [r.headers.get("Range") for r in m.request_history
+                  if r.url == IMG_URL]
+
+    assert ranges == [f"bytes={len(IMG) + 4}-", None]
+    assert img_path.read_bytes() == IMG
+    assert list(files_dir.glob("*.part")) == []
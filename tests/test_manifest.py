@@ -0,0 +1,100 @@
+import hashlib
+import json
+import logging
+
+import requests_mock
+
+from page_loader.manifest import Manifest
+from page_loader.page_loader import download
+
+logger = logging.getLogger(__name__)
+
+URL = "https://ru.hexlet.io/courses"
+CSS_URL = "https://ru.hexlet.io/assets/application.css"
+JS_URL = "https://ru.hexlet.io/packs/js/runtime.js"
+PAGE = '''
+<html>
+  <head>
+    <link href="/assets/application.css" rel="stylesheet">
+    <script src="/packs/js/runtime.js"></script>
+  </head>
+</html>
+'''
+CSS = b"body { background: white; }"
+JS = b"console.log('ok');"
+
+
+def conditional_response(etag, content):
+    """Отвечает 304, если клиент прислал актуальный ETag"""
+    def callback(request, context):
+        if request.headers.get("If-None-Match") == etag:
+            context.status_code = 304
+            return b""
+        context.headers["ETag"] = etag
+        return content
+    return callback
+
+
+def test_incremental_download_skips_unchanged(tmp_path):
+    """Тестирование повторной загрузки с условными запросами"""
+    files_dir = tmp_path / "ru-hexlet-io-courses_files"
+    manifest_path = tmp_path / "ru-hexlet-io-courses_files.manifest.json"
+
+    with requests_mock.Mocker() as m:
+        m.get(URL, text=PAGE)
+        m.get(CSS_URL, content=conditional_response('"css-1"', CSS))
+        m.get(JS_URL, content=JS,
+              headers={"Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT"})
+
+        logger.info("Первый запуск: скачиваем всё и пишем манифест")
+        first_html = download(URL, tmp_path, incremental=True)
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        assert manifest[CSS_URL]["etag"] == '"css-1"'
+        assert manifest[CSS_URL]["size"] == len(CSS)
+        assert manifest[CSS_URL]["sha256"] == hashlib.sha256(CSS).hexdigest()
+        assert manifest[JS_URL]["last_modified"] == \
+            "Wed, 21 Oct 2015 07:28:00 GMT"
+
+        logger.info("Второй запуск: директория уже есть, CSS не изменился")
+        m.reset_mock()
+        second_html = download(URL, tmp_path, incremental=True)
+        history = {r.url: r for r in m.request_history}
+
+    assert second_html == first_html
+    assert history[CSS_URL].headers["If-None-Match"] == '"css-1"'
+    assert history[JS_URL].headers["If-Modified-Since"] == \
+        "Wed, 21 Oct 2015 07:28:00 GMT"
+    assert (files_dir / "ru-hexlet-io-assets-application.css").read_bytes() \
+        == CSS
+    html = (tmp_path / "ru-hexlet-io-courses.html").read_text(
+        encoding="utf-8")
+    assert 'href="ru-hexlet-io-courses_files/' \
+           'ru-hexlet-io-assets-application.css"' in html
+
+
+def test_incremental_refetches_missing_file(tmp_path):
+    """Тестирование: удалённый файл скачивается без условного запроса"""
+    with requests_mock.Mocker() as m:
+        m.get(URL, text=PAGE)
+        m.get(CSS_URL, content=conditional_response('"css-1"', CSS))
+        m.get(JS_URL, content=JS)
+        download(URL, tmp_path, incremental=True)
+
+        css_path = (tmp_path / "ru-hexlet-io-courses_files" /
+                    "ru-hexlet-io-assets-application.css")
+        css_path.unlink()
+        m.reset_mock()
+        download(URL, tmp_path, incremental=True)
+        css_request = [r for r in m.request_history if r.url == CSS_URL][0]
+
+    assert "If-None-Match" not in css_request.headers
+    assert css_path.read_bytes() == CSS
+
+
+def test_manifest_load_broken_file(tmp_path):
+    """Тестирование: повреждённый манифест читается как пустой"""
+    path = tmp_path / "broken.manifest.json"
+    path.write_text("{not json", encoding="utf-8")
+    manifest = Manifest.load(path)
+    assert len(manifest) == 0
+    assert manifest.conditional_headers(CSS_URL, tmp_path / "x.css") == {}
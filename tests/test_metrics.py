@@ -0,0 +1,82 @@
+import json
+import logging
+import sys
+
+import requests
+import requests_mock
+
+from page_loader import cli
+from page_loader.metrics import Metrics
+from page_loader.page_loader import download
+
+logger = logging.getLogger(__name__)
+
+URL = "https://ru.hexlet.io/courses"
+PAGE = '''<html><head><link href="/app.css" rel="stylesheet">
+<script src="/app.js"></script></head>
+<body><img src="/broken.png"><img src="/big.png"></body></html>'''
+
+
+def mock_page(m):
+    m.get(URL, text=PAGE)
+    m.get("https://ru.hexlet.io/app.css", content=b"css-data")
+    m.get("https://ru.hexlet.io/app.js", content=b"js")
+    m.get("https://ru.hexlet.io/broken.png", status_code=404)
+    m.get("https://ru.hexlet.io/big.png", content=b"x" * 100)
+
+
+def test_metrics_collects_stages_and_resources(tmp_path):
+    """Тестирование сбора метрик по этапам и ресурсам"""
+    events = []
+    metrics = Metrics(hooks=[lambda event, data: events.append(event)])
+
+    with requests_mock.Mocker() as m:
+        mock_page(m)
+        download(URL, tmp_path, max_size=50, metrics=metrics)
+
+    report = metrics.report()
+    logger.debug("Отчёт: %s", report)
+    assert set(report["stages"]) == {
+        "page_fetch", "parse", "resources", "resource_request",
+        "resource_body", "serialize", "write_html"}
+    assert report["stages"]["resource_request"]["count"] == 4
+
+    statuses = {r["url"].rsplit("/", 1)[1]: r["status"]
+                for r in report["resources"]}
+    assert statuses == {"app.css": "ok", "app.js": "ok",
+                        "broken.png": "error", "big.png": "too_large"}
+    assert report["totals"]["bytes_downloaded"] == len(b"css-data") + 2
+    assert report["totals"]["retries"] == 0
+    assert report["pages"][0]["path"].endswith("ru-hexlet-io-courses.html")
+    assert events.count("resource") == 4
+    assert events.count("page") == 1
+
+
+def test_metrics_records_failed_page(tmp_path):
+    """Тестирование: ошибка страницы попадает в отчёт"""
+    metrics = Metrics()
+    with requests_mock.Mocker() as m:
+        m.get(URL, status_code=503)
+        try:
+            download(URL, tmp_path, metrics=metrics)
+        except requests.HTTPError:
+            pass
+
+    page = metrics.report()["pages"][0]
+    assert page["path"] is None
+    assert "503" in page["error"]
+
+
+def test_cli_report(monkeypatch, tmp_path):
+    """Тестирование JSON-отчёта из CLI"""
+    report_path = tmp_path / "report.json"
+    monkeypatch.setattr(sys, "argv", ["page-loader", URL, "-o",
+                                      str(tmp_path), "--report",
+                                      str(report_path)])
+    with requests_mock.Mocker() as m:
+        mock_page(m)
+        cli.main()
+
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    assert report["totals"]["resources"] == 4
+    assert report["totals"]["statuses"] == {"ok": 3, "error": 1}
@@ -0,0 +1,120 @@
+import gzip
+import logging
+import os
+import sys
+
+import requests_mock
+
+from page_loader import cli
+from page_loader.mirror import Frontier, mirror
+from page_loader.storage import MemoryStorage
+
+logger = logging.getLogger(__name__)
+
+SITE = {
+    "https://site.io/": '''<html><head><link href="/style.css"
+        rel="stylesheet"></head><body>
+        <a href="/a">A</a> <a href="/b.html#top">B</a>
+        <a href="https://other.io/x">внешняя</a>
+        <a href="mailto:me@site.io">почта</a>
+        <a href="/file.zip">архив</a></body></html>''',
+    "https://site.io/a": '''<html><head><link href="/style.css"
+        rel="stylesheet"></head><body><a href="/">главная</a>
+        <a href="/c">C</a></body></html>''',
+    "https://site.io/b.html": '<html><body><a href="a">A</a></body></html>',
+    "https://site.io/c": '<html><body>C</body></html>',
+}
+
+
+def mock_site(m):
+    for url, html in SITE.items():
+        m.get(url, text=html)
+    m.get("https://site.io/style.css", content=b"css")
+
+
+def test_mirror_follows_same_host_links(tmp_path):
+    """Тестирование зеркалирования с ограничением глубины"""
+    with requests_mock.Mocker() as m:
+        mock_site(m)
+        logger.info("Зеркалируем сайт с глубиной 1")
+        pages = mirror("https://site.io/", tmp_path, depth=1, page_workers=2)
+        requested = [r.url for r in m.request_history]
+
+    assert set(pages) == {"https://site.io/", "https://site.io/a",
+                          "https://site.io/b.html"}
+    assert "https://site.io/c" not in requested
+    assert "https://site.io/file.zip" not in requested
+    assert requested.count("https://site.io/style.css") == 1
+
+    index = (tmp_path / "site-io.html").read_text(encoding="utf-8")
+    assert 'href="site-io-a.html"' in index
+    assert 'href="site-io-b.html#top"' in index
+    assert 'href="https://other.io/x"' in index
+    assert 'href="shared_files/site-io-style.css"' in index
+
+    page_a = (tmp_path / "site-io-a.html").read_text(encoding="utf-8")
+    assert 'href="site-io.html"' in page_a
+    logger.debug("Ссылка на страницу за пределами глубины не меняется")
+    assert 'href="/c"' in page_a
+
+
+def test_mirror_depth_zero(tmp_path):
+    """Тестирование: глубина 0 скачивает только стартовую страницу"""
+    with requests_mock.Mocker() as m:
+        mock_site(m)
+        pages = mirror("https://site.io/", tmp_path, depth=0)
+    assert list(pages) == ["https://site.io/"]
+
+
+def test_mirror_to_memory_storage():
+    """Тестирование: ссылки между страницами переписываются в storage"""
+    storage = MemoryStorage()
+    with requests_mock.Mocker() as m:
+        mock_site(m)
+        pages = mirror("https://site.io/", "/out", depth=1,
+                       storage=storage)
+
+    index = storage.read(pages["https://site.io/"]).decode("utf-8")
+    assert 'href="site-io-a.html"' in index
+    assert 'href="shared_files/site-io-style.css"' in index
+    page_a = storage.read(pages["https://site.io/a"]).decode("utf-8")
+    assert 'href="site-io.html"' in page_a
+
+
+def test_frontier_deduplicates():
+    """Тестирование очереди обхода без повторов"""
+    frontier = Frontier("https://site.io/")
+    assert not frontier.add("https://site.io/", 1)
+    assert frontier.add("https://site.io/a", 1)
+    assert not frontier.add("https://site.io/a", 2)
+    assert frontier.pop_level() == (0, ["https://site.io/"])
+    assert frontier.pop_level() == (1, ["https://site.io/a"])
+    assert frontier.pop_level() == (None, [])
+
+
+def test_cli_depth(capsys, monkeypatch, tmp_path):
+    """Тестирование режима зеркалирования в CLI"""
+    monkeypatch.setattr(sys, "argv", ["page-loader", "https://site.io/",
+                                      "--depth", "2", "-o", str(tmp_path)])
+    with requests_mock.Mocker() as m:
+        mock_site(m)
+        cli.main()
+
+    assert len(capsys.readouterr().out.split()) == 4
+
+
+def test_cli_depth_compress(capsys, monkeypatch, tmp_path):
+    """Тестирование зеркалирования со сжатием: печатаются файлы .gz"""
+    monkeypatch.setattr(sys, "argv", ["page-loader", "https://site.io/",
+                                      "--depth", "1", "--compress",
+                                      "-o", str(tmp_path)])
+    with requests_mock.Mocker() as m:
+        mock_site(m)
+        cli.main()
+
+    paths = capsys.readouterr().out.split()
+    assert len(paths) == 3
+    assert all(path.endswith(".html.gz") and os.path.exists(path)
+               for path in paths)
+    index = gzip.decompress((tmp_path / "site-io.html.gz").read_bytes())
+    assert b'href="site-io-a.html"' in index
@@ -1,3 +1,4 @@
+import gzip
 import logging
 import os
 import subprocess
@@ -10,8 +11,11 @@ import requests
 import requests_mock
 from bs4 import BeautifulSoup
 
-from page_loader import cli
-from page_loader.page_loader import (download_resource, is_local_resource,
+from page_loader import cli, make_session
+from page_loader.session import close_session, get_session
+from page_loader.page_loader import (MAX_FILENAME_BYTES, FileNamer,
+                                     ResourceTooLargeError,
+                                     download_resource, is_local_resource,
                                      make_filename, download)
 
 # Настройка логирования для читаемого вывода
@@ -44,6 +48,62 @@ def test_make_filename():
         assert result == expected
 
 
+def test_make_filename_query_and_length():
+    """Тестирование строки запроса и ограничения длины имени"""
+    assert make_filename("https://site.com/a.js?v=1") == "site-com-a-v-1.js"
+    assert make_filename("https://site.com/a.js?v=2") == "site-com-a-v-2.js"
+
+    long_url = "https://site.com/" + "раздел/" * 100 + "file.png"
+    name = make_filename(long_url)
+    assert len(name.encode("utf-8")) <= MAX_FILENAME_BYTES
+    assert name.endswith(".png")
+    assert name == make_filename(long_url)
+    assert name != make_filename(long_url + "?v=2")
+
+
+def test_file_namer_resolves_collisions():
+    """Тестирование: разные URL с одинаковым именем не перезаписываются"""
+    namer = FileNamer()
+    first = namer.name("https://site.com/a/b.png")
+    second = namer.name("https://site.com/a-b.png")
+    third = namer.name("https://site.com/A/b.png")
+
+    assert first == "site-com-a-b.png"
+    assert len({first.lower(), second.lower(), third.lower()}) == 3
+    assert namer.name("https://site.com/a-b.png") == second
+
+
+def test_file_namer_does_not_depend_on_order():
+    """Тестирование: имя файла не зависит от порядка URL"""
+    urls = ["https://site.com/x-y.png", "https://site.com/x/y.png",
+            "https://site.com/a.js?v=1&x", "https://site.com/a.js?v=1-x"]
+    forward, backward = FileNamer(), FileNamer()
+    names = [forward.name(url) for url in urls]
+
+    assert names == [backward.name(url) for url in reversed(urls)][::-1]
+    assert names[1] == "site-com-x-y.png"
+    assert len(set(names)) == len(urls)
+
+
+def test_download_keeps_colliding_resources(tmp_path):
+    """Тестирование загрузки ресурсов, имена которых совпали бы"""
+    url = "https://site.com/page"
+    html = '''<html><body><script src="/a.js?v=1"></script>
+<img src="/a/b.png"><img src="/a-b.png"></body></html>'''
+    with requests_mock.Mocker() as m:
+        m.get(url, text=html)
+        m.get("https://site.com/a.js?v=1", content=b"js")
+        m.get("https://site.com/a/b.png", content=b"first")
+        m.get("https://site.com/a-b.png", content=b"second")
+        download(url, tmp_path)
+
+    files = {p.name: p.read_bytes()
+             for p in (tmp_path / "site-com-page_files").iterdir()}
+    assert files["site-com-a-v-1.js"] == b"js"
+    assert files["site-com-a-b.png"] == b"first"
+    assert sorted(files.values()) == [b"first", b"js", b"second"]
+
+
 @pytest.mark.parametrize("status_code", [404, 500])
 def test_response_errors(temp_dir, status_code):
     """Тестирование обработки ошибок 404 и 500"""
@@ -400,7 +460,7 @@ def test_cli_download_success(capsys, monkeypatch, tmp_path):
 
     # Подмена download() чтобы не трогать сеть
     monkeypatch.setattr(
-        "page_loader.cli.download", lambda u, o: str(fake_file))
+        "page_loader.page_loader.download", lambda u, o, **kw: str(fake_file))
     monkeypatch.setattr(
         sys, "argv", ["page-loader", url, "-o", str(tmp_path)])
 
@@ -427,3 +487,202 @@ def test_is_local_resource():
     logger.debug("Внешние ресурсы корректно определены")
 
     logger.info("Тест функции is_local_resource успешно пройден")
+
+
+def test_download_concurrent_matches_sequential(tmp_path):
+    """Тестирование параллельной загрузки ресурсов пулом потоков"""
+    url = "https://ru.hexlet.io/courses"
+    html_content = "<html><head>" + "".join(
+        f'<script src="/js/app{i}.js"></script>' for i in range(20)
+    ) + '<link href="/css/main.css" rel="stylesheet">' \
+        '<img src="/css/main.css"></head></html>'
+
+    outputs = {}
+    with requests_mock.Mocker() as m:
+        m.get(url, text=html_content)
+        m.get("https://ru.hexlet.io/css/main.css", content=b"css")
+        for i in range(20):
+            m.get(f"https://ru.hexlet.io/js/app{i}.js",
+                  content=f"js{i}".encode())
+
+        for workers in (1, 8):
+            out_dir = tmp_path / f"workers-{workers}"
+            out_dir.mkdir()
+            logger.info("Скачиваем страницу с max_workers=%s", workers)
+            html_path = download(url, out_dir, max_workers=workers)
+            files_dir = out_dir / "ru-hexlet-io-courses_files"
+            outputs[workers] = (
+                Path(html_path).read_text(encoding="utf-8"),
+                {p.name: p.read_bytes() for p in files_dir.iterdir()})
+
+        # Один и тот же ресурс скачивается один раз
+        css_requests = [r for r in m.request_history
+                        if r.url.endswith("main.css")]
+        assert len(css_requests) == 2
+
+    assert outputs[1] == outputs[8]
+    assert len(outputs[8][1]) == 21
+    logger.info("Тест параллельной загрузки успешно пройден")
+
+
+def test_download_invalid_workers(tmp_path):
+    """Тестирование ошибки при некорректном max_workers"""
+    with pytest.raises(ValueError):
+        download("https://example.com", tmp_path, max_workers=0)
+
+
+def test_cli_passes_workers(monkeypatch, tmp_path):
+    """Тестирование передачи --workers из CLI в download()"""
+    calls = {}
+
+    def fake_download(url, output, **kwargs):
+        calls.update(kwargs)
+        return str(tmp_path / "example-com.html")
+
+    monkeypatch.setattr("page_loader.page_loader.download", fake_download)
+    monkeypatch.setattr(sys, "argv", ["page-loader", "https://example.com",
+                                      "-o", str(tmp_path), "--workers", "4"])
+    cli.main()
+    assert calls["max_workers"] == 4
+
+
+def test_download_with_injected_session(tmp_path):
+    """Тестирование загрузки через переданную сессию с общим пулом"""
+    url = "https://ru.hexlet.io/courses"
+    html = '<html><body><img src="/img.png"></body></html>'
+
+    session = make_session(pool_maxsize=4)
+    adapter = requests_mock.Adapter()
+    adapter.register_uri("GET", url, text=html)
+    adapter.register_uri("GET", "https://ru.hexlet.io/img.png",
+                         content=b"png")
+    session.mount("https://", adapter)
+
+    logger.info("Проверяем, что страница и ресурсы идут через одну сессию")
+    for name in ("first", "second"):
+        out_dir = tmp_path / name
+        out_dir.mkdir()
+        download(url, out_dir, max_workers=2, session=session)
+
+    assert adapter.call_count == 4
+    assert (tmp_path / "second" / "ru-hexlet-io-courses_files" /
+            "ru-hexlet-io-img.png").read_bytes() == b"png"
+
+
+def test_shared_session_reused():
+    """Тестирование общей сессии процесса"""
+    close_session()
+    session = get_session()
+    assert get_session() is session
+    assert session.get_adapter("https://example.com")._pool_maxsize == 10
+    close_session()
+    assert get_session() is not session
+
+
+def test_download_resource_streams_to_file(tmp_path):
+    """Тестирование потоковой записи ресурса без временных файлов"""
+    url = "https://hexlet.io/video.mp4"
+    data = os.urandom(200 * 1024)
+    save_path = tmp_path / "sub" / "video.mp4"
+
+    with requests_mock.Mocker() as m:
+        m.get(url, content=data)
+        written = download_resource(url, str(save_path))
+
+    assert written == len(data)
+    assert save_path.read_bytes() == data
+    assert os.listdir(save_path.parent) == ["video.mp4"]
+
+
+def test_download_resource_decodes_gzip_stream(tmp_path):
+    """Тестирование: сжатый при передаче ресурс сохраняется распакованным"""
+    url = "https://hexlet.io/app.js"
+    data = b"console.log('ok');\n" * 10_000
+    save_path = tmp_path / "app.js"
+
+    with requests_mock.Mocker() as m:
+        m.get(url, content=gzip.compress(data),
+              headers={"Content-Encoding": "gzip"})
+        written = download_resource(url, str(save_path),
+                                    session=make_session())
+        sent = m.last_request.headers["Accept-Encoding"]
+
+    assert "gzip" in sent
+    assert written == len(data)
+    assert save_path.read_bytes() == data
+
+
+@pytest.mark.parametrize("headers", [{"Content-Length": "100"}, {}])
+def test_download_resource_oversize_skip(tmp_path, headers):
+    """Тестирование пропуска ресурса больше max_size"""
+    url = "https://hexlet.io/big.pdf"
+    save_path = tmp_path / "big.pdf"
+
+    with requests_mock.Mocker() as m:
+        m.get(url, content=b"x" * 100, headers=headers)
+        with pytest.raises(ResourceTooLargeError):
+            download_resource(url, str(save_path), max_size=10)
+
+    logger.debug("Проверяем, что ни итоговый, ни временный файл не остались")
+    assert os.listdir(tmp_path) == []
+
+
+def test_download_resource_oversize_truncate(tmp_path):
+    """Тестирование обрезки ресурса больше max_size"""
+    url = "https://hexlet.io/big.pdf"
+    save_path = tmp_path / "big.pdf"
+
+    with requests_mock.Mocker() as m:
+        m.get(url, content=b"0123456789" * 10)
+        written = download_resource(url, str(save_path), max_size=15,
+                                    on_oversize="truncate")
+
+    assert written == 15
+    assert save_path.read_bytes() == b"012345678901234"
+
+
+def test_download_skips_oversized_resource(tmp_path):
+    """Тестирование: слишком большой ресурс не ломает загрузку страницы"""
+    url = "https://hexlet.io/page"
+    html = '<html><body><img src="/big.png"><img src="/small.png"></body>' \
+           '</html>'
+
+    with requests_mock.Mocker() as m:
+        m.get(url, text=html)
+        m.get("https://hexlet.io/big.png", content=b"x" * 1000)
+        m.get("https://hexlet.io/small.png", content=b"x")
+        path = download(url, tmp_path, max_size=100)
+
+    content = Path(path).read_text(encoding="utf-8")
+    assert 'src="/big.png"' in content
+    assert 'src="hexlet-io-page_files/hexlet-io-small.png"' in content
+    files_dir = tmp_path / "hexlet-io-page_files"
+    assert not (files_dir / "hexlet-io-big.png").exists()
+
+
+def test_import_has_no_logging_side_effects():
+    """Тестирование: импорт пакета не настраивает логирование"""
+    code = ("import logging, page_loader; "
+            "assert not logging.getLogger().handlers; "
+            "page_loader.page_loader.logger.warning('тихо')")
+    result = subprocess.run([sys.executable, "-c", code],
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stderr == ""
+
+
+def test_collect_resources_without_debug(monkeypatch):
+    """Тестирование: при выключенном DEBUG сообщения не формируются"""
+    from page_loader import page_loader as module
+    from page_loader.document import make_document
+
+    def fail(*args, **kwargs):
+        raise AssertionError("logger.debug не должен вызываться")
+
+    monkeypatch.setattr(module.logger, "isEnabledFor", lambda level: False)
+    monkeypatch.setattr(module.logger, "debug", fail)
+    document = make_document(
+        '<img src="/a.png"><img><script src="https://cdn.io/x.js"></script>')
+
+    resources = module.collect_resources(document, "https://site.io/page")
+    assert list(resources) == ["https://site.io/a.png"]
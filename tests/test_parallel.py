@@ -0,0 +1,75 @@
+import logging
+
+import pytest
+import requests_mock
+
+from page_loader.batch import download_batch
+from page_loader.parallel import ParsePool
+
+logger = logging.getLogger(__name__)
+
+PAGE = '''<html>
+  <head>
+    <link href="/assets/site.css" rel="stylesheet">
+    <link href="/courses" rel="canonical">
+    <style>body {{ background: url("/images/bg.png") }}</style>
+  </head>
+  <body>
+    <img src="/images/{name}.png" srcset="/images/{name}.png 2x">
+    <a href="/blog">Блог</a>
+  </body>
+</html>
+'''
+NAMES = ["courses", "blog", "about"]
+
+
+def mock_site(m):
+    m.get("https://ru.hexlet.io/assets/site.css",
+          text='@import "print.css";')
+    m.get("https://ru.hexlet.io/assets/print.css", text="p {}")
+    m.get("https://ru.hexlet.io/images/bg.png", content=b"bg")
+    for name in NAMES:
+        m.get(f"https://ru.hexlet.io/{name}", text=PAGE.format(name=name))
+        m.get(f"https://ru.hexlet.io/images/{name}.png",
+              content=name.encode())
+
+
+def read_tree(path):
+    return {str(p.relative_to(path)): p.read_bytes()
+            for p in path.rglob("*") if p.is_file()}
+
+
+@pytest.mark.parametrize("rewrite", ["prettify", "minimal"])
+def test_parse_pool_matches_threads(tmp_path, rewrite):
+    """Тестирование: разбор в процессах даёт те же файлы, что в потоках"""
+    urls = [f"https://ru.hexlet.io/{name}" for name in NAMES]
+    threads_dir = tmp_path / "threads"
+    pool_dir = tmp_path / "pool"
+    threads_dir.mkdir()
+    pool_dir.mkdir()
+
+    with requests_mock.Mocker() as m, ParsePool(2) as pool:
+        mock_site(m)
+        download_batch(urls, threads_dir, page_workers=3, rewrite=rewrite)
+        logger.info("Скачиваем страницы с разбором в пуле процессов")
+        results = download_batch(urls, pool_dir, page_workers=3,
+                                 rewrite=rewrite, parse_pool=pool)
+
+    assert None not in results.values()
+    assert read_tree(pool_dir) == read_tree(threads_dir)
+
+
+def test_remote_document_discard():
+    """Тестирование: документ без render() освобождается в процессе"""
+    with ParsePool(1) as pool:
+        document = pool.parse(PAGE.format(name="blog"))
+        tags = [(tag, attr) for _, tag, attr, _ in document.links()]
+        document.discard()
+        document.discard()
+        rendered = pool.parse('<img src="a.png">', rewrite='minimal')
+        ref = rendered.links()[0][0]
+        rendered.set_link(ref, 'src', 'b.png')
+        html = rendered.render()
+
+    assert ('link', 'href') in tags and ('img', 'srcset') in tags
+    assert html == '<img src="b.png">'
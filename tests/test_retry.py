@@ -0,0 +1,115 @@
+import logging
+from email.utils import formatdate
+
+import pytest
+import requests
+import requests_mock
+
+from page_loader.metrics import Metrics
+from page_loader.page_loader import download
+from page_loader.ratelimit import HostRateLimiter, TokenBucket
+from page_loader.retry import RetryPolicy, fetch_with_retry
+
+logger = logging.getLogger(__name__)
+
+URL = "https://ru.hexlet.io/courses"
+
+
+def test_fetch_with_retry_honors_retry_after():
+    """Тестирование повтора после 503 с заголовком Retry-After"""
+    sleeps = []
+    policy = RetryPolicy(attempts=3, backoff=1, jitter=False)
+
+    with requests_mock.Mocker() as m:
+        m.get(URL, [{"status_code": 503, "headers": {"Retry-After": "7"}},
+                    {"status_code": 500},
+                    {"text": "ok"}])
+        response, retries = fetch_with_retry(requests.Session(), URL, policy,
+                                             sleep=sleeps.append)
+
+    assert response.text == "ok"
+    assert retries == 2
+    assert sleeps == [7.0, 2]
+
+
+def test_fetch_with_retry_gives_up():
+    """Тестирование: после последней попытки ошибка пробрасывается"""
+    sleeps = []
+    policy = RetryPolicy(attempts=2, backoff=0.1, jitter=False)
+
+    with requests_mock.Mocker() as m:
+        m.get(URL, exc=requests.ConnectionError("нет сети"))
+        with pytest.raises(requests.ConnectionError):
+            fetch_with_retry(requests.Session(), URL, policy,
+                             sleep=sleeps.append)
+        assert m.call_count == 2
+    assert sleeps == [0.1]
+
+
+def test_fetch_without_policy_does_not_retry():
+    """Тестирование: без политики выполняется одна попытка"""
+    with requests_mock.Mocker() as m:
+        m.get(URL, status_code=503)
+        response, retries = fetch_with_retry(requests.Session(), URL)
+        assert m.call_count == 1
+    assert response.status_code == 503
+    assert retries == 0
+
+
+def test_retry_policy_delays():
+    """Тестирование экспоненциальной задержки, разброса и Retry-After"""
+    policy = RetryPolicy(backoff=0.5, max_backoff=3, jitter=False)
+    assert [policy.delay(n) for n in range(4)] == [0.5, 1, 2, 3]
+
+    jittered = RetryPolicy(backoff=0.5, max_backoff=3)
+    assert all(0 <= jittered.delay(3) <= 3 for _ in range(20))
+
+    response = requests.Response()
+    response.headers["Retry-After"] = formatdate(usegmt=True)
+    assert policy.delay(0, response) == pytest.approx(0, abs=1)
+
+
+def test_download_retries_page_and_resources(tmp_path):
+    """Тестирование повторов для страницы и ресурсов в download()"""
+    metrics = Metrics()
+    with requests_mock.Mocker() as m:
+        m.get(URL, [{"status_code": 503}, {"text": '<img src="/a.png">'}])
+        m.get("https://ru.hexlet.io/a.png",
+              [{"status_code": 502}, {"status_code": 429},
+               {"content": b"png"}])
+        download(URL, tmp_path, metrics=metrics,
+                 retry=RetryPolicy(attempts=3, backoff=0))
+
+    resource = metrics.report()["resources"][0]
+    assert resource["status"] == "ok"
+    assert resource["retries"] == 2
+    assert (tmp_path / "ru-hexlet-io-courses_files" /
+            "ru-hexlet-io-a.png").read_bytes() == b"png"
+
+
+def test_token_bucket(monkeypatch):
+    """Тестирование ведра токенов: запас burst и пополнение со временем"""
+    now = [100.0]
+    monkeypatch.setattr("page_loader.ratelimit.time.monotonic",
+                        lambda: now[0])
+    bucket = TokenBucket(rate=2, burst=2)
+
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.5)
+    now[0] += 1.5
+    assert bucket.reserve() == 0
+
+
+def test_host_rate_limiter(monkeypatch):
+    """Тестирование интервала между запросами к одному хосту"""
+    sleeps = []
+    monkeypatch.setattr("page_loader.ratelimit.time.monotonic",
+                        lambda: 100.0)
+    monkeypatch.setattr("page_loader.ratelimit.time.sleep", sleeps.append)
+
+    limiter = HostRateLimiter(rate=2)
+    for url in ("https://a.io/1", "https://a.io/2", "https://b.io/1",
+                "https://a.io/3"):
+        limiter.wait(url)
+    assert sleeps == [pytest.approx(0.5), pytest.approx(1.0)]
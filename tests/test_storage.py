@@ -0,0 +1,101 @@
+import gzip
+import json
+import logging
+import os
+
+import pytest
+import requests_mock
+
+from page_loader.cache import ResourceCache
+from page_loader.page_loader import download
+from page_loader.storage import (CompressedStorage, LocalS3Client,
+                                 LocalStorage, MemoryStorage, ObjectStorage)
+
+logger = logging.getLogger(__name__)
+
+URL = "https://site.com/page"
+HTML = '<html><body><img src="/a.png"><script src="/app.js"></script>' \
+       '</body></html>'
+
+
+def mock_site(m):
+    m.get(URL, text=HTML)
+    m.get("https://site.com/a.png", content=b"png")
+    m.get("https://site.com/app.js", content=b"js")
+
+
+def test_download_to_memory(tmp_path):
+    """Тестирование загрузки страницы в память без записи на диск"""
+    storage = MemoryStorage()
+    with requests_mock.Mocker() as m:
+        mock_site(m)
+        html_path = download(URL, "/out", storage=storage)
+
+    assert html_path == os.path.join("/out", "site-com-page.html")
+    assert sorted(storage.files) == [
+        "/out/site-com-page.html",
+        "/out/site-com-page_files/site-com-a.png",
+        "/out/site-com-page_files/site-com-app.js"]
+    assert storage.read("/out/site-com-page_files/site-com-a.png") == b"png"
+    assert b"site-com-page_files/site-com-app.js" in storage.read(html_path)
+
+    with requests_mock.Mocker() as m:
+        mock_site(m)
+        with pytest.raises(Exception, match="Ошибка при создании директории"):
+            download(URL, "/out", storage=storage)
+
+
+def test_object_storage_batches_small_objects(tmp_path):
+    """Тестирование отложенной пакетной отправки мелких объектов"""
+    client = LocalS3Client(tmp_path)
+    storage = ObjectStorage(client, "pages", prefix="run1", batch_size=10)
+    with requests_mock.Mocker() as m:
+        mock_site(m)
+        download(URL, "out", storage=storage)
+
+    assert client.puts == 3
+    assert storage.size("out/site-com-page_files/site-com-a.png") == 3
+    path = tmp_path / "pages" / "run1" / "out" / "site-com-page_files"
+    assert (path / "site-com-app.js").read_bytes() == b"js"
+
+
+def test_local_storage_removes_partial_file(tmp_path):
+    """Тестирование: при ошибке записи временный файл удаляется"""
+    path = tmp_path / "file.bin"
+    with pytest.raises(RuntimeError):
+        with LocalStorage().open(path) as f:
+            f.write(b"data")
+            raise RuntimeError("обрыв")
+    assert os.listdir(tmp_path) == []
+
+
+def test_cache_requires_local_storage(tmp_path):
+    """Тестирование: кеш несовместим с хранилищем в памяти"""
+    with pytest.raises(ValueError):
+        download(URL, "/out", storage=MemoryStorage(),
+                 cache=ResourceCache(tmp_path))
+
+
+def test_compressed_storage(tmp_path):
+    """Тестирование сохранения текстовых файлов сжатыми с индексом"""
+    storage = CompressedStorage(tmp_path)
+    with requests_mock.Mocker() as m:
+        mock_site(m)
+        html_path = download(URL, tmp_path, storage=storage)
+
+    files = tmp_path / "site-com-page_files"
+    assert sorted(p.name for p in files.iterdir()) == [
+        "site-com-a.png", "site-com-app.js.gz"]
+    html = gzip.decompress((tmp_path / "site-com-page.html.gz").read_bytes())
+    assert b"site-com-page_files/site-com-app.js" in html
+    logger.debug("download() возвращает путь в storage, без .gz")
+    assert html_path == os.path.join(tmp_path, "site-com-page.html")
+    assert storage.location(html_path) == html_path + ".gz"
+    assert storage.read(html_path) == html
+    index = json.loads((tmp_path / "compressed.json").read_text())
+    assert index["site-com-page_files/site-com-app.js"] == {
+        "path": "site-com-page_files/site-com-app.js.gz",
+        "encoding": "gzip", "size": 2,
+        "compressed_size": (files / "site-com-app.js.gz").stat().st_size}
+    assert set(index) == {"site-com-page.html",
+                          "site-com-page_files/site-com-app.js"}